@@ -1,9 +1,39 @@
-from typing import Dict, List
+import csv
+import io
+import json
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Iterator, List, Literal, Optional, Tuple
 
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from librero.recommender import Book, recommend_book, get_books_from_db
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from librero.pipeline import recommend_books
+from librero.recommender import (
+    BOOK_FIELDS,
+    Book,
+    fallback_books,
+    get_books_from_db,
+    iter_books,
+    query_books,
+    recommend_book,
+)
+from librero.serialization import PayloadCache, dumps
+from librero.warmup import WarmUp, default_steps
+from pydantic import BaseModel, Field
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse encoded with the fast path from librero.serialization."""
+
+    def render(self, content: object) -> bytes:
+        return dumps(content)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Warm caches and indexes in the background; /ready reports when done."""
+    warmup.start()
+    yield
 
 # Initialize FastAPI app with metadata for OpenAPI docs
 app = FastAPI(
@@ -11,7 +41,9 @@ app = FastAPI(
     description="A book recommendation service for Albert Camus works",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url=None
+    redoc_url=None,
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
 # Configure CORS
@@ -49,6 +81,48 @@ class RecommendResponse(BaseModel):
             }
         }
 
+class RankedRecommendRequest(BaseModel):
+    """Request model for ranked recommendations."""
+    books_read: List[str]
+    limit: int = Field(default=5, ge=1, le=50)
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "books_read": ["The Stranger", "The Plague"],
+                "limit": 5
+            }
+        }
+
+class RankedBook(BaseModel):
+    """A recommended book with its score and the reasons it was picked."""
+    title: str
+    authors: str
+    score: float
+    reasons: List[str]
+
+class RankedRecommendResponse(BaseModel):
+    """Response model for ranked recommendations."""
+    recommendations: List[RankedBook]
+    timings_ms: Dict[str, float]
+    degraded: List[str]
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "recommendations": [
+                    {
+                        "title": "The Fall",
+                        "authors": "Albert Camus/Justin O'Brien",
+                        "score": 1.2773,
+                        "reasons": ["Similar to 'The Stranger'", "Also by Albert Camus"]
+                    }
+                ],
+                "timings_ms": {"seeds": 5.8, "candidates": 10.0, "scoring": 3.8, "rerank": 2.1, "total": 21.7},
+                "degraded": []
+            }
+        }
+
 @app.get("/health",
     summary="Health Check",
     description="Returns the health status of the API",
@@ -57,6 +131,34 @@ async def health_check() -> Dict[str, str]:
     """Check if the API is healthy."""
     return {"status": "healthy", "service": "librero-recommender"}
 
+def _recommend_response(recommendation: str, message: str, total_books: int) -> FastJSONResponse:
+    """Encode a RecommendResponse body directly.
+
+    Returning a Response skips FastAPI's validation and re-serialization of the
+    output model; the fields here are already the right types.
+    """
+    return FastJSONResponse({
+        "recommendation": recommendation,
+        "message": message,
+        "total_books": total_books
+    })
+
+@app.get("/ready",
+    summary="Readiness Check",
+    description="Returns 200 once caches and indexes are warm for the current catalog, 503 until then",
+    response_description="Readiness status with per-step warm-up status and timings",
+    responses={
+        503: {"description": "Still warming up"}
+    })
+def readiness_check() -> FastJSONResponse:
+    """Report whether the service is warmed up and ready for traffic.
+
+    Unlike /health, this only succeeds after the start-up warm-up, and drops
+    back to 503 while caches are rebuilt after a catalog reload.
+    """
+    report = warmup.report()
+    return FastJSONResponse(report, status_code=200 if report["status"] == "ready" else 503)
+
 @app.post("/api/recommend",
     summary="Get Book Recommendation",
     description="Returns a recommended book by Albert Camus based on what you've already read",
@@ -85,10 +187,13 @@ async def health_check() -> Dict[str, str]:
             }
         }
     })
-async def get_recommendation(request: RecommendRequest) -> RecommendResponse:
+def get_recommendation(request: RecommendRequest) -> FastJSONResponse:
     """
     Get a book recommendation based on previously read books.
 
+    A plain def, so FastAPI runs it in its thread pool: the database calls
+    block, and concurrent requests must overlap to share the catalog load.
+
     Args:
         request: RecommendRequest containing list of books already read
 
@@ -103,13 +208,13 @@ async def get_recommendation(request: RecommendRequest) -> RecommendResponse:
         db_books = get_books_from_db()
         total_books = len(db_books) if db_books else 0
         if not total_books:
-            return RecommendResponse(
+            return _recommend_response(
                 recommendation="No books available",
                 message="No books found in the database",
                 total_books=0
             )
     except Exception as e:
-        return RecommendResponse(
+        return _recommend_response(
             recommendation="Error",
             message=f"Failed to fetch books: {str(e)}",
             total_books=0
@@ -117,17 +222,16 @@ async def get_recommendation(request: RecommendRequest) -> RecommendResponse:
 
     # Validate book titles against database
     try:
-        db_books = get_books_from_db()
         known_titles = {title.lower() for title, _ in db_books}
         unknown_titles = [title for title in request.books_read if title.lower() not in known_titles]
         if unknown_titles:
-            return RecommendResponse(
+            return _recommend_response(
                 recommendation="No recommendation available",
                 message=f"Unknown book title(s): {', '.join(unknown_titles)}",
                 total_books=total_books
             )
     except Exception as e:
-        return RecommendResponse(
+        return _recommend_response(
             recommendation="Error",
             message=f"Failed to validate book titles: {str(e)}",
             total_books=total_books
@@ -139,31 +243,165 @@ async def get_recommendation(request: RecommendRequest) -> RecommendResponse:
 
     # Handle all books read case
     if remaining_books <= 0:
-        return RecommendResponse(
+        return _recommend_response(
             recommendation="No recommendation available",
             message="You've read all of Camus' major works! Time for a re-read.",
             total_books=total_books
         )
 
     # Return recommendation
-    return RecommendResponse(
+    return _recommend_response(
         recommendation=book.title,
         message=f"Next up: '{book.title}' ({book.year}), a {book.genre.lower()}. {remaining_books - 1} more books to explore!",
         total_books=total_books
     )
 
+@app.post("/api/recommendations",
+    summary="Get Ranked Recommendations",
+    description="Returns the top-N unread books with the reasons they were picked, "
+                "plus per-stage timings of the recommendation pipeline",
+    response_model=RankedRecommendResponse)
+def get_ranked_recommendations(request: RankedRecommendRequest) -> FastJSONResponse:
+    """
+    Get ranked recommendations based on previously read books.
+
+    Candidates from several generators are scored and re-ranked for diversity.
+    Stages that run over their time budget degrade instead of failing and are
+    listed in ``degraded``.
+
+    Args:
+        request: RankedRecommendRequest with the books already read and how many to return
+
+    Returns:
+        RankedRecommendResponse with recommendations, timings and degraded stages
+    """
+    result = recommend_books(request.books_read, n=request.limit)
+    return FastJSONResponse({
+        "recommendations": [vars(book) for book in result.recommendations],
+        "timings_ms": result.timings_ms,
+        "degraded": result.degraded
+    })
+
+# Encoded /api/books pages, rebuilt when books.db changes
+_book_pages = PayloadCache()
+# Larger pages are encoded per request instead of being cached
+MAX_CACHED_PAGE_SIZE = 1000
+
+def _page_body(rows: List[Tuple[str, str]]) -> Dict[str, List[Dict[str, str]]]:
+    return {"books": [{"title": title, "authors": authors} for title, authors in rows]}
+
+def _books_page(limit: int) -> Optional[Dict[str, List[Dict[str, str]]]]:
+    """The /api/books body, or None if books.db could not be read."""
+    rows = query_books(limit)
+    return None if rows is None else _page_body(rows)
+
+# Page sizes pre-encoded during warm-up
+COMMON_PAGE_SIZES = (5, 10)
+
+def _warm_book_pages() -> None:
+    for limit in COMMON_PAGE_SIZES:
+        if _book_pages.get_or_build(limit, lambda: _books_page(limit)) is None:
+            raise RuntimeError("books.db could not be read")
+
+# Start-up warm-up; /ready reports ready once every step has run
+warmup = WarmUp(default_steps() + [("book_pages", _warm_book_pages)])
+
 @app.get("/api/books")
-def list_books(limit: int = 5):
+def list_books(limit: int = 5) -> Response:
     """Get a list of books from the database.
-    
+
+    Common page sizes are served from pre-encoded bytes cached per catalog version.
+
     Args:
         limit: Maximum number of books to return (default: 5)
         
     Returns:
-        dict: A dictionary containing a list of books with their titles and authors
+        Response: JSON body with a list of books with their titles and authors
     """
     try:
-        books = get_books_from_db(limit)
-        return {"books": [{"title": title, "authors": authors} for title, authors in books]}
+        # A negative LIMIT means no limit to SQLite; never cache whole-catalog bodies
+        if 0 < limit <= MAX_CACHED_PAGE_SIZE:
+            payload = _book_pages.get_or_build(limit, lambda: _books_page(limit))
+        else:
+            page = _books_page(limit)
+            payload = None if page is None else dumps(page)
+        if payload is None:
+            # books.db could not be read: serve the default books, never cached
+            payload = dumps(_page_body(fallback_books(limit)))
+        return Response(content=payload, media_type="application/json")
     except Exception as e:
-        return {"error": f"Failed to fetch books: {str(e)}"}
+        return FastJSONResponse({"error": f"Failed to fetch books: {str(e)}"})
+
+
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+def _encode_export(
+    batches: Iterator[List[tuple]], fields: List[str], fmt: str
+) -> Iterator[bytes]:
+    """Encode row batches as NDJSON or CSV, one chunk per batch."""
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(fields)
+        for rows in batches:
+            writer.writerows(rows)
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode("utf-8")
+    else:
+        for rows in batches:
+            yield "".join(
+                json.dumps(dict(zip(fields, row)), ensure_ascii=False) + "\n" for row in rows
+            ).encode("utf-8")
+
+@app.get("/api/books/export",
+    summary="Export Catalog",
+    description="Streams the whole catalog as NDJSON (one book per line) or CSV",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "content": {
+                "application/x-ndjson": {},
+                "text/csv": {}
+            }
+        },
+        400: {"description": "Unknown field requested"}
+    })
+def export_books(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    fields: Optional[str] = None,
+    language_code: Optional[str] = None,
+    author: Optional[str] = None,
+) -> StreamingResponse:
+    """Stream every book in the catalog.
+
+    Rows go from a database cursor to the client batch by batch, so memory use
+    does not grow with the catalog and output starts immediately.
+
+    Args:
+        format: ``ndjson`` (default) or ``csv``
+        fields: Comma-separated columns to include (default: all)
+        language_code: Only books in this language
+        author: Only books whose authors contain this text
+
+    Returns:
+        StreamingResponse with the encoded catalog
+
+    Raises:
+        HTTPException: If an unknown field is requested
+    """
+    selected = [name.strip() for name in fields.split(",") if name.strip()] if fields else list(BOOK_FIELDS)
+    unknown = [name for name in selected if name not in BOOK_FIELDS]
+    if unknown or not selected:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown field(s): {', '.join(unknown)}. Available: {', '.join(BOOK_FIELDS)}"
+        )
+    batches = iter_books(selected, language_code=language_code, author=author)
+    return StreamingResponse(
+        _encode_export(batches, selected, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="books.{format}"'}
+    )
@@ -0,0 +1,175 @@
+"""Benchmark the ANN similarity index against brute-force search.
+
+Builds synthetic catalogs of increasing size from the real ``books.db`` (titles,
+authors and languages are recombined so that realistic near-duplicates and
+same-author clusters exist), then reports, for several ``probes`` settings:
+
+- recall@k of the index's Hamming ranking against exact cosine brute force
+- recall@k after re-ranking the top ``4 * k`` index results by exact cosine,
+  which is what ``get_similar_books()`` does
+- query latency (p50 / p95) next to the brute-force cost per query
+
+Recall is tie-aware: a returned book counts as a hit when it is at least as
+similar as the k-th exact neighbor, since same-author books often tie.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.bench_ann                       # 100k, 1M and 10M books
+    python -m benchmarks.bench_ann --sizes 100000 --queries 20
+
+Pure Python: expect roughly two minutes per million books for the signature
+and ground-truth pass.
+"""
+import argparse
+import heapq
+import os
+import random
+import resource
+import sqlite3
+import statistics
+import tempfile
+import time
+from array import array
+from typing import Dict, List, Sequence, Tuple
+
+from librero.ann import AnnIndex, Features, book_features, cosine, signature, write_index
+from librero.db import DB_PATH
+
+Row = Tuple[str, str, str]
+
+
+def load_rows(db_path: str = DB_PATH) -> List[Row]:
+    con = sqlite3.connect(db_path)
+    try:
+        rows = con.execute("SELECT title, authors, language_code FROM books").fetchall()
+    finally:
+        con.close()
+    return [(t or "", a or "", lang or "") for t, a, lang in rows]
+
+
+class SyntheticCatalog:
+    """Deterministic catalog of ``size`` books derived from real rows.
+
+    Book ``i`` is regenerated on demand from its index, so the catalog never has
+    to be held in memory.
+    """
+
+    def __init__(self, rows: Sequence[Row], size: int, seed: int = 42) -> None:
+        self.rows = rows
+        self.size = size
+        self.seed = seed
+        self.vocabulary = sorted({w for t, _, _ in rows for w in t.split() if len(w) > 3})
+        self.authors = sorted({a.split("/")[0] for _, a, _ in rows if a})
+
+    def book(self, i: int) -> Row:
+        rng = random.Random(self.seed * 1_000_003 + i)
+        title, authors, language = rng.choice(self.rows)
+        words = title.split()
+        for _ in range(rng.randint(0, 2)):
+            if words and rng.random() < 0.5:
+                words.pop(rng.randrange(len(words)))
+            else:
+                words.insert(rng.randrange(len(words) + 1), rng.choice(self.vocabulary))
+        if rng.random() < 0.2:
+            authors = rng.choice(self.authors)
+        return " ".join(words), authors, language
+
+    def features(self, i: int) -> Features:
+        return book_features(*self.book(i))
+
+
+def ground_truth_pass(
+    catalog: SyntheticCatalog, query_ids: Sequence[int], k: int
+) -> Tuple[array, List[int], Dict[int, float], float]:
+    """One streaming pass: signatures for the index and exact top-k per query.
+
+    Returns:
+        Tuple of (ids, signatures, k-th best similarity per query,
+        brute-force seconds per query)
+    """
+    queries = {q: catalog.features(q) for q in query_ids}
+    heaps: Dict[int, List[Tuple[float, int]]] = {q: [] for q in query_ids}
+    ids = array("q")
+    signatures: List[int] = []
+    brute_force_time = 0.0
+    for i in range(catalog.size):
+        features = catalog.features(i)
+        ids.append(i)
+        signatures.append(signature(features))
+        start = time.perf_counter()
+        for q, query in queries.items():
+            if q != i:
+                item = (cosine(query, features), i)
+                heap = heaps[q]
+                if len(heap) < k:
+                    heapq.heappush(heap, item)
+                elif item > heap[0]:
+                    heapq.heapreplace(heap, item)
+        brute_force_time += time.perf_counter() - start
+    kth_best = {q: heap[0][0] for q, heap in heaps.items()}
+    return ids, signatures, kth_best, brute_force_time / len(query_ids)
+
+
+def run(size: int, rows: Sequence[Row], queries: int, k: int, probes: Sequence[int]) -> None:
+    catalog = SyntheticCatalog(rows, size)
+    query_ids = random.Random(7).sample(range(size), min(queries, size))
+
+    start = time.perf_counter()
+    ids, signatures, kth_best, brute_force_s = ground_truth_pass(catalog, query_ids, k)
+    pass_s = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "books.ann")
+        start = time.perf_counter()
+        write_index(path, ids, signatures)
+        write_s = time.perf_counter() - start
+        index = AnnIndex(path)
+        print(
+            f"\n== {size:,} books: {index.signature_bits}-bit signatures, "
+            f"{index.n_bands} bands x {index.band_bits} bits, "
+            f"{os.path.getsize(path) / 2**20:.1f} MiB, "
+            f"signatures+ground truth {pass_s:.1f}s, index write {write_s:.1f}s"
+        )
+        print(f"brute force (exact cosine): {brute_force_s * 1000:.1f} ms/query")
+        print(f"{'probes':>6} {'recall@' + str(k):>10} {'reranked':>9} {'p50 ms':>8} {'p95 ms':>8}")
+        for p in probes:
+            latencies = []
+            raw_hits = reranked_hits = 0
+            for q in query_ids:
+                features = catalog.features(q)
+                start = time.perf_counter()
+                found = index.query(features, k=4 * k, probes=p, exclude=[q])
+                latencies.append(time.perf_counter() - start)
+                threshold = kth_best[q] - 1e-9
+                similarities = [(cosine(features, catalog.features(i)), i) for i, _ in found]
+                raw_hits += sum(sim >= threshold for sim, _ in similarities[:k])
+                reranked = sorted(similarities, reverse=True)[:k]
+                reranked_hits += sum(sim >= threshold for sim, _ in reranked)
+            total = k * len(query_ids)
+            latencies.sort()
+            p95 = latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+            print(
+                f"{p:>6} {raw_hits / total:>10.3f} {reranked_hits / total:>9.3f} "
+                f"{statistics.median(latencies) * 1000:>8.2f} {p95 * 1000:>8.2f}"
+            )
+        index.close()
+    peak_mib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"peak RSS so far: {peak_mib:,.0f} MiB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000, 10_000_000])
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--probes", type=int, nargs="+", default=[0, 2, 4, 8])
+    args = parser.parse_args()
+
+    rows = load_rows()
+    print(f"Seeding synthetic catalogs from {len(rows):,} real books")
+    for size in args.sizes:
+        run(size, rows, args.queries, args.k, args.probes)
+
+
+if __name__ == "__main__":
+    main()
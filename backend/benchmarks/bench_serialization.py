@@ -0,0 +1,101 @@
+"""Benchmark JSON serialization cost per response size.
+
+Compares, for ``/api/books`` pages of increasing size and for a
+``/api/recommend`` body:
+
+- ``default``: build dicts, run FastAPI's ``jsonable_encoder`` and encode with
+  ``json.dumps`` (what a plain ``return {...}`` costs)
+- ``model``: validate a Pydantic response model and dump it
+- ``stdlib``: build dicts and encode with compact ``json.dumps`` (the fallback
+  when orjson is not installed)
+- ``fast``: build dicts and encode with ``librero.serialization.dumps``
+- ``cached``: serve pre-encoded bytes from a ``PayloadCache`` (catalog version
+  check plus a dictionary lookup)
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.bench_serialization
+    python -m benchmarks.bench_serialization --sizes 5 100 10000
+"""
+import argparse
+import json
+import timeit
+from typing import Any, Callable, Dict, List
+
+from fastapi.encoders import jsonable_encoder
+from librero import serialization
+from librero.recommender import get_books_from_db
+from librero.serialization import PayloadCache, dumps
+from pydantic import BaseModel
+
+
+class RecommendResponse(BaseModel):
+    recommendation: str
+    message: str
+    total_books: int
+
+
+def _default_encoder(content: object) -> bytes:
+    return json.dumps(
+        jsonable_encoder(content), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def _stdlib_encoder(content: object) -> bytes:
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _time_us(func: Callable[[], object]) -> float:
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    best = min(timer.repeat(repeat=3, number=max(number, 1)))
+    return best / max(number, 1) * 1e6
+
+
+def bench_books(sizes: List[int]) -> None:
+    cache = PayloadCache()
+    print(f"\n/api/books (encoder: {'orjson' if serialization.orjson else 'json'})")
+    print(f"{'limit':>7} {'bytes':>9} {'default us':>11} {'stdlib us':>10} {'fast us':>9} {'cached us':>10}")
+    for size in sizes:
+        rows = get_books_from_db(size)
+
+        def build() -> Dict[str, List[Dict[str, str]]]:
+            return {"books": [{"title": title, "authors": authors} for title, authors in rows]}
+
+        payload = cache.get_or_build(size, build)
+        assert payload is not None
+        default_us = _time_us(lambda: _default_encoder(build()))
+        stdlib_us = _time_us(lambda: _stdlib_encoder(build()))
+        fast_us = _time_us(lambda: dumps(build()))
+        cached_us = _time_us(lambda: cache.get_or_build(size, build))
+        print(
+            f"{len(rows):>7} {len(payload):>9} {default_us:>11.1f} {stdlib_us:>10.1f} "
+            f"{fast_us:>9.1f} {cached_us:>10.2f}"
+        )
+
+
+def bench_recommend() -> None:
+    body: Dict[str, Any] = {
+        "recommendation": "The Fall",
+        "message": "Next up: 'The Fall' (1956), a philosophical fiction. 4 more books to explore!",
+        "total_books": 7,
+    }
+    print("\n/api/recommend body")
+    print(f"{'path':>8} {'us':>8}")
+    model_us = _time_us(lambda: RecommendResponse(**body).model_dump_json().encode("utf-8"))
+    print(f"{'model':>8} {model_us:>8.2f}")
+    print(f"{'default':>8} {_time_us(lambda: _default_encoder(dict(body))):>8.2f}")
+    print(f"{'stdlib':>8} {_time_us(lambda: _stdlib_encoder(dict(body))):>8.2f}")
+    print(f"{'fast':>8} {_time_us(lambda: dumps(dict(body))):>8.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 50, 500, 5000])
+    args = parser.parse_args()
+    bench_books(args.sizes)
+    bench_recommend()
+
+
+if __name__ == "__main__":
+    main()
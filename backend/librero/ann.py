@@ -0,0 +1,377 @@
+"""Approximate nearest-neighbor index over book feature vectors.
+
+Books are turned into sparse, hashed feature vectors built from the catalog's
+own fields (title words, authors and language). Each vector is reduced to a
+random-hyperplane signature (SimHash) of a few hundred bits, and the signature
+is split into bands that are used as hash-table keys. Books that land in the
+same bucket of any band are candidates, and candidates are ranked by the
+Hamming distance between signatures, which approximates the angle between the
+feature vectors.
+
+The index is built offline next to ``books.db`` and stored in a flat binary
+file that is memory-mapped at startup, so opening it costs no parsing and the
+pages are shared between worker processes.
+"""
+import hashlib
+import math
+import mmap
+import os
+import re
+import struct
+import tempfile
+from array import array
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from .db import BASE_DIR
+
+INDEX_PATH = os.path.join(BASE_DIR, "data", "books.ann")
+
+# Signature width; a multiple of 64. Wider signatures give more bands (recall)
+# and a finer Hamming ranking at the cost of build time and index size.
+SIGNATURE_BITS = 256
+MAGIC = b"LANN"
+FORMAT_VERSION = 1
+# magic, version, item count, signature bits, band count, bits per band
+HEADER = struct.Struct("<4sIQIII4x")
+
+# Number of extra buckets probed per band; the recall/latency knob
+DEFAULT_PROBES = 4
+
+# Relative weight of each field in the feature vector
+TITLE_WEIGHT = 1.0
+AUTHOR_WEIGHT = 2.0
+CONTRIBUTOR_WEIGHT = 0.5
+LANGUAGE_WEIGHT = 0.5
+
+_WORD_RE = re.compile(r"[^\W_]+")
+# Title words too common to say anything about similarity
+STOPWORDS = frozenset({"an", "and", "at", "by", "for", "from", "in", "of", "on", "or", "the", "to", "with"})
+
+Features = Dict[int, float]
+
+
+def _feature_hash(token: str) -> int:
+    """Stable 64-bit hash of a feature token (``hash()`` is salted per process)."""
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def book_features(title: str, authors: str, language_code: str = "") -> Features:
+    """Build an L2-normalized sparse feature vector for a book.
+
+    Args:
+        title: Book title; each word is a feature
+        authors: ``/``-separated names; the first (main author) weighs the most
+        language_code: Language code, a weak feature
+
+    Returns:
+        Dict mapping 64-bit feature hashes to weights
+    """
+    features: Features = {}
+
+    def add(token: str, weight: float) -> None:
+        key = _feature_hash(token)
+        features[key] = features.get(key, 0.0) + weight
+
+    for word in _WORD_RE.findall(title.lower()):
+        if len(word) > 1 and word not in STOPWORDS:
+            add("t:" + word, TITLE_WEIGHT)
+    # The first name is the author; the rest are usually translators or editors
+    for position, author in enumerate(authors.split("/")):
+        author = author.strip().lower()
+        if author:
+            add("a:" + author, AUTHOR_WEIGHT if position == 0 else CONTRIBUTOR_WEIGHT)
+    if language_code:
+        add("l:" + language_code.strip().lower(), LANGUAGE_WEIGHT)
+
+    norm = math.sqrt(sum(w * w for w in features.values()))
+    if norm:
+        for key in features:
+            features[key] /= norm
+    return features
+
+
+def cosine(a: Features, b: Features) -> float:
+    """Cosine similarity of two normalized feature vectors."""
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(w * b.get(key, 0.0) for key, w in a.items())
+
+
+def _mix64(key: int, word: int) -> int:
+    """Derive the ``word``-th 64-bit hash of a feature (splitmix64 finalizer)."""
+    z = (key + word * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & 0xFFFFFFFFFFFFFFFF
+    return z ^ (z >> 31)
+
+
+# Bit-sliced projection: every signature bit gets a 32-bit lane in one big int,
+# so a feature's contribution to all hyperplanes is a single multiply-add.
+_LANE_BITS = 32
+_BYTE_LANES = [
+    sum(1 << (_LANE_BITS * i) for i in range(8) if byte >> i & 1) for byte in range(256)
+]
+_LANE_HIGH = 1 << (_LANE_BITS - 1)
+# Maps a lane's top byte to the ASCII digit of its top bit
+_TOP_BIT_DIGIT = bytes(ord("1") if byte & 0x80 else ord("0") for byte in range(256))
+# Feature weights are quantized to integers for the lane arithmetic
+_WEIGHT_SCALE = 1 << 16
+
+
+@lru_cache(maxsize=1 << 16)
+def _spread_bits(key: int, bits: int) -> int:
+    """Spread the ``bits``-bit extended hash of a feature into 32-bit lanes."""
+    spread = 0
+    for word in range(bits // 64):
+        h = key if word == 0 else _mix64(key, word)
+        for byte in range(8):
+            lanes = _BYTE_LANES[(h >> (8 * byte)) & 0xFF]
+            spread |= lanes << (_LANE_BITS * (64 * word + 8 * byte))
+    return spread
+
+
+def _accumulate(features: Features, bits: int) -> Tuple[int, int]:
+    """Sum the quantized weights of the features with bit ``j`` set, in lane ``j``.
+
+    Returns:
+        Tuple of (lanes packed in one int, total quantized weight)
+    """
+    acc = 0
+    total = 0
+    for key, weight in features.items():
+        w = round(weight * _WEIGHT_SCALE)
+        acc += w * _spread_bits(key, bits)
+        total += w
+    return acc, total
+
+
+@lru_cache(maxsize=None)
+def _lane_ones(bits: int) -> int:
+    """A 1 in every lane."""
+    return sum(1 << (_LANE_BITS * j) for j in range(bits))
+
+
+def projections(features: Features, bits: int = SIGNATURE_BITS) -> List[int]:
+    """Project a feature vector onto ``bits`` random ±1 hyperplanes.
+
+    Hyperplane ``j`` takes coordinate ``+1`` for a feature when bit ``j`` of the
+    feature's (extended) hash is set and ``-1`` otherwise, so no plane is ever
+    stored. Values are scaled by ``2**16``; only their sign and relative
+    magnitude matter.
+    """
+    acc, total = _accumulate(features, bits)
+    set_weights = memoryview(acc.to_bytes(bits * _LANE_BITS // 8, "little")).cast("I")
+    return [2 * s - total for s in set_weights]
+
+
+def signature(features: Features, bits: int = SIGNATURE_BITS) -> int:
+    """SimHash signature of a feature vector, as a ``bits``-bit integer."""
+    acc, total = _accumulate(features, bits)
+    # Bias every lane so its top bit is set exactly when the projection is positive,
+    # then read the top byte of each lane
+    acc += (_LANE_HIGH - 1 - total // 2) * _lane_ones(bits)
+    high_bytes = acc.to_bytes(bits * _LANE_BITS // 8, "little")[_LANE_BITS // 8 - 1::_LANE_BITS // 8]
+    return int(high_bytes.translate(_TOP_BIT_DIGIT)[::-1], 2)
+
+
+def default_band_bits(n_items: int) -> int:
+    """Bits per band so that buckets hold a handful of items on average."""
+    return max(8, min(16, n_items.bit_length() - 4))
+
+
+class AnnIndex:
+    """Read-only, memory-mapped LSH index.
+
+    File layout (little endian, 8-byte aligned sections)::
+
+        header
+        ids          int64[n]                 book ids, ascending
+        signatures   bytes[n][bits / 8]       signature of ids[i]
+        per band:
+            offsets  uint64[2**band_bits + 1]   bucket start in postings
+            postings uint32[n]                  item positions grouped by bucket
+    """
+
+    def __init__(self, path: str = INDEX_PATH) -> None:
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"Empty ANN index file: {path}")
+        magic, version, n, bits, n_bands, band_bits = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"Not a librero ANN index (v{FORMAT_VERSION}): {path}")
+        self.n_items: int = n
+        self.signature_bits: int = bits
+        self.n_bands: int = n_bands
+        self.band_bits: int = band_bits
+
+        view = self._view = memoryview(self._mmap)
+        pos = HEADER.size
+        self._ids = view[pos:pos + 8 * n].cast("q")
+        pos += 8 * n
+        self._sig_size = bits // 8
+        self._signatures = view[pos:pos + self._sig_size * n]
+        pos += self._sig_size * n
+        n_buckets = 1 << band_bits
+        self._offsets = []
+        self._postings = []
+        for _ in range(n_bands):
+            self._offsets.append(view[pos:pos + 8 * (n_buckets + 1)].cast("Q"))
+            pos += 8 * (n_buckets + 1)
+            self._postings.append(view[pos:pos + 4 * n].cast("I"))
+            pos += _align8(4 * n)
+
+    def __len__(self) -> int:
+        return self.n_items
+
+    def close(self) -> None:
+        """Release the memory map."""
+        for name in ("_ids", "_signatures"):
+            view = getattr(self, name, None)
+            if view is not None:
+                view.release()
+        for views in (getattr(self, "_offsets", []), getattr(self, "_postings", [])):
+            for view in views:
+                view.release()
+        if getattr(self, "_view", None) is not None:
+            self._view.release()
+        self._mmap.close()
+        self._file.close()
+
+    def signature_of(self, book_id: int) -> Optional[int]:
+        """Stored signature of a book, or None if it is not indexed."""
+        i = bisect_left(self._ids, book_id)
+        if i < self.n_items and self._ids[i] == book_id:
+            return self._signature(i)
+        return None
+
+    def _signature(self, i: int) -> int:
+        start = i * self._sig_size
+        return int.from_bytes(self._signatures[start:start + self._sig_size], "little")
+
+    def query(
+        self,
+        features: Features,
+        k: int = 10,
+        probes: int = DEFAULT_PROBES,
+        exclude: Iterable[int] = (),
+    ) -> List[Tuple[int, int]]:
+        """Find the books whose signatures are closest to a feature vector.
+
+        Args:
+            features: Query vector from book_features()
+            k: Number of neighbors to return
+            probes: Extra buckets probed per band, flipping the least confident
+                signature bits first. 0 only looks at the exact buckets; higher
+                values raise recall and latency.
+            exclude: Book ids to leave out of the results
+
+        Returns:
+            List of (book_id, hamming_distance), closest first
+
+        Raises:
+            ValueError: If probes is negative
+        """
+        if probes < 0:
+            raise ValueError(f"probes must be >= 0, got {probes}")
+        proj = projections(features, self.signature_bits)
+        sig = 0
+        for j, value in enumerate(proj):
+            if value > 0:
+                sig |= 1 << j
+
+        mask = (1 << self.band_bits) - 1
+        candidates: Set[int] = set()
+        for band in range(self.n_bands):
+            shift = band * self.band_bits
+            key = (sig >> shift) & mask
+            # Multi-probe: bits whose projection is near zero are the likeliest to differ
+            weak_bits = sorted(range(self.band_bits), key=lambda b: abs(proj[shift + b]))
+            offsets = self._offsets[band]
+            postings = self._postings[band]
+            for probe_key in [key] + [key ^ (1 << b) for b in weak_bits[:probes]]:
+                candidates.update(postings[offsets[probe_key]:offsets[probe_key + 1]])
+
+        excluded = set(exclude)
+        scored = []
+        for i in candidates:
+            book_id = self._ids[i]
+            if book_id not in excluded:
+                scored.append(((sig ^ self._signature(i)).bit_count(), book_id))
+        scored.sort()
+        return [(book_id, distance) for distance, book_id in scored[:k]]
+
+    @classmethod
+    def build(
+        cls,
+        items: Iterable[Tuple[int, Features]],
+        path: str = INDEX_PATH,
+        band_bits: Optional[int] = None,
+        signature_bits: int = SIGNATURE_BITS,
+    ) -> "AnnIndex":
+        """Build an index file from (book_id, features) pairs and open it.
+
+        The file is written next to its final location and moved into place,
+        so a running server never maps a half-written index.
+        """
+        pairs = sorted(
+            (book_id, signature(features, signature_bits)) for book_id, features in items
+        )
+        ids = array("q", (book_id for book_id, _ in pairs))
+        signatures = [sig for _, sig in pairs]
+        write_index(path, ids, signatures, band_bits, signature_bits)
+        return cls(path)
+
+
+def _align8(size: int) -> int:
+    return (size + 7) & ~7
+
+
+def write_index(
+    path: str,
+    ids: Sequence[int],
+    signatures: Sequence[int],
+    band_bits: Optional[int] = None,
+    signature_bits: int = SIGNATURE_BITS,
+) -> None:
+    """Write the index file for ids (ascending) and their signatures."""
+    if signature_bits % 64:
+        raise ValueError(f"signature_bits must be a multiple of 64, got {signature_bits}")
+    n = len(ids)
+    band_bits = band_bits or default_band_bits(n)
+    n_bands = signature_bits // band_bits
+    n_buckets = 1 << band_bits
+    mask = n_buckets - 1
+
+    # A unique temp file, so two concurrent builds never write into the same one
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    os.chmod(tmp_path, 0o644)
+    with os.fdopen(fd, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, n, signature_bits, n_bands, band_bits))
+        f.write(array("q", ids).tobytes())
+        sig_size = signature_bits // 8
+        f.writelines(sig.to_bytes(sig_size, "little") for sig in signatures)
+        for band in range(n_bands):
+            shift = band * band_bits
+            keys = array("I", ((sig >> shift) & mask for sig in signatures))
+            # Counting sort of item positions by bucket key
+            offsets = array("Q", bytes(8 * (n_buckets + 1)))
+            for key in keys:
+                offsets[key + 1] += 1
+            for b in range(n_buckets):
+                offsets[b + 1] += offsets[b]
+            fill = array("Q", offsets[:-1])
+            postings = array("I", bytes(4 * n))
+            for i, key in enumerate(keys):
+                postings[fill[key]] = i
+                fill[key] += 1
+            f.write(offsets.tobytes())
+            f.write(postings.tobytes())
+            f.write(bytes(_align8(4 * n) - 4 * n))
+    os.replace(tmp_path, path)
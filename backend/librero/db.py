@@ -1,9 +1,26 @@
 import os
 import sqlite3
+from typing import Optional, Tuple
 
 # Get the directory where this file is located
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DB_PATH = os.path.join(BASE_DIR, "data", "books.db")
 
-def get_connection():
-    return sqlite3.connect(DB_PATH)
+def get_connection(check_same_thread: bool = True) -> sqlite3.Connection:
+    return sqlite3.connect(DB_PATH, check_same_thread=check_same_thread)
+
+def file_version(path: str) -> Optional[Tuple[int, int]]:
+    """Identify the current state of a file; it changes whenever the file is written.
+
+    Returns:
+        Tuple of (modification time in ns, size), or None if the file is missing
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+def catalog_version() -> Optional[Tuple[int, int]]:
+    """Identify the current state of books.db, see file_version()."""
+    return file_version(DB_PATH)
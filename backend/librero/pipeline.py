@@ -0,0 +1,525 @@
+"""Staged recommendation pipeline.
+
+0. **seeds**: the books already read are looked up.
+1. **candidates**: generators (popular titles, same author, same language,
+   ANN neighbors) each return a bounded set. The CPU-bound ANN lookup runs in
+   a thread pool while the SQL generators run inline in the request.
+2. **scoring**: every candidate is scored against the books already read.
+3. **rerank**: maximal marginal relevance (MMR) picks the top-N, trading
+   relevance for diversity.
+
+Each stage has its own time budget. A stage that runs over degrades instead of
+failing: SQL queries are interrupted at the stage deadline, a late seed lookup
+leaves only unpersonalized candidates, late generators are dropped, unscored
+candidates keep their prior score, and MMR falls back to plain relevance order. The result carries the
+per-stage timings and which stages degraded.
+"""
+import random
+import sqlite3
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from .ann import DEFAULT_PROBES, Features, book_features, cosine
+from .db import catalog_version, get_connection
+from .recommender import get_ann_index
+from .singleflight import SingleFlight
+
+# Time budget per stage, in milliseconds
+STAGE_BUDGETS_MS: Dict[str, float] = {
+    "seeds": 50.0,
+    "candidates": 150.0,
+    "scoring": 50.0,
+    "rerank": 50.0,
+}
+
+# Maximum candidates produced by each generator
+CANDIDATES_PER_SOURCE = 100
+
+# Most frequent seed authors searched by the author generator, one query each
+MAX_SEED_AUTHORS = 5
+
+# Prior added to a candidate's score for each generator that produced it
+SOURCE_WEIGHTS: Dict[str, float] = {
+    "neighbors": 0.3,
+    "author": 0.25,
+    "popular": 0.1,
+    "language": 0.05,
+}
+POPULARITY_WEIGHT = 0.2
+
+# MMR trade-off: 1.0 is pure relevance, 0.0 is pure diversity
+MMR_LAMBDA = 0.7
+
+# Check the clock every this many items inside a stage
+_BUDGET_CHECK_EVERY = 32
+# ... and every this many SQLite VM instructions inside a query
+_BUDGET_CHECK_OPS = 1000
+
+# Generators that run inline in the request thread: SQL queries that are
+# interrupted at the stage deadline (popular is also cached), so every request
+# gets candidates even when the pool is saturated
+INLINE_GENERATORS = ("author", "popular", "language")
+
+# Shared by all requests; sized for several in-flight requests, each of which
+# submits one task per pooled generator
+_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="librero-candidates")
+# Coalesces identical concurrent candidate generation and catalog aggregates
+_flights = SingleFlight()
+
+
+@dataclass
+class Candidate:
+    """A book considered for recommendation."""
+    book_id: int
+    title: str
+    authors: str
+    language_code: str
+    # generator name -> human readable reason
+    sources: Dict[str, str] = field(default_factory=dict)
+    popularity: float = 0.0
+    score: float = 0.0
+    _features: Optional[Features] = field(default=None, init=False, repr=False)
+
+    @property
+    def features(self) -> Features:
+        if self._features is None:
+            self._features = book_features(self.title, self.authors, self.language_code)
+        return self._features
+
+    def copy(self) -> "Candidate":
+        """Copy with its own sources and score, sharing the read-only features."""
+        copy = Candidate(
+            self.book_id, self.title, self.authors, self.language_code,
+            dict(self.sources), self.popularity, self.score,
+        )
+        copy._features = self._features
+        return copy
+
+
+@dataclass
+class Recommendation:
+    """A ranked recommendation with the reasons it was picked."""
+    title: str
+    authors: str
+    score: float
+    reasons: List[str]
+
+
+@dataclass
+class RankedRecommendations:
+    """Pipeline output: top-N books, per-stage timings and degraded stages."""
+    recommendations: List[Recommendation]
+    timings_ms: Dict[str, float]
+    degraded: List[str]
+
+
+Row = Tuple[int, str, str, str]
+# (seeds, limit, deadline) -> candidates
+Generator = Callable[[List[Candidate], int, Optional[float]], List[Candidate]]
+
+
+class DeadlineExceeded(Exception):
+    """A query was interrupted because its stage ran out of time."""
+
+
+def _main_author(authors: str) -> str:
+    return authors.split("/")[0].strip()
+
+
+def _query(query: str, params: Sequence, deadline: Optional[float] = None) -> List[tuple]:
+    """Run a query, interrupting it once time.perf_counter() passes deadline.
+
+    Raises:
+        DeadlineExceeded: If the query was interrupted
+    """
+    con = get_connection()
+    try:
+        if deadline is not None:
+            con.set_progress_handler(lambda: time.perf_counter() > deadline, _BUDGET_CHECK_OPS)
+        return con.execute(query, params).fetchall()
+    except sqlite3.OperationalError as e:
+        if deadline is not None and time.perf_counter() > deadline:
+            raise DeadlineExceeded(str(e)) from e
+        raise
+    finally:
+        con.close()
+
+
+def _fetch(query: str, params: Sequence, deadline: Optional[float] = None) -> List[Row]:
+    return [
+        (book_id, title or "", authors or "", language_code or "")
+        for book_id, title, authors, language_code in _query(query, params, deadline)
+    ]
+
+
+def find_seeds(books_read: Sequence[str], deadline: Optional[float] = None) -> List[Candidate]:
+    """Look up the books already read, one row per title."""
+    if not books_read:
+        return []
+    titles = sorted({title.lower() for title in books_read})
+    placeholders = ",".join("?" * len(titles))
+    rows = _fetch(
+        f"""
+        SELECT id, title, authors, language_code FROM books
+        WHERE lower(title) IN ({placeholders})
+        ORDER BY id
+        """,
+        titles,
+        deadline,
+    )
+    seeds: Dict[str, Candidate] = {}
+    for row in rows:
+        seeds.setdefault(row[1].lower(), Candidate(*row))
+    return list(seeds.values())
+
+
+# (catalog version, limit) -> rows of the last popular titles query
+_popular_cache: Dict[Tuple[Optional[Tuple[int, int]], int], List[Tuple[Row, int]]] = {}
+
+
+def _popular_rows(limit: int, deadline: Optional[float] = None) -> List[Tuple[Row, int]]:
+    """Titles with the most editions; the catalog has no ratings.
+
+    Cached per catalog version because the aggregate scans the whole table,
+    and concurrent misses share one query. The warm-up fills the cache without
+    a deadline, so requests do not pay for the scan.
+    """
+    version = catalog_version()
+    key = (version, limit)
+    rows = _popular_cache.get(key)
+    if rows is None:
+        rows = _flights.do(("popular", *key), lambda: _query_popular_rows(limit, deadline))
+        _popular_cache.clear()
+        _popular_cache[key] = rows
+    return rows
+
+
+def _query_popular_rows(limit: int, deadline: Optional[float]) -> List[Tuple[Row, int]]:
+    rows = _query(
+        """
+        SELECT MIN(id), title, authors, language_code, COUNT(*) AS editions
+        FROM books
+        GROUP BY lower(title)
+        ORDER BY editions DESC, MIN(id)
+        LIMIT ?
+        """,
+        (limit,),
+        deadline,
+    )
+    return [((r[0], r[1] or "", r[2] or "", r[3] or ""), r[4]) for r in rows]
+
+
+def popular_candidates(
+    seeds: List[Candidate], limit: int, deadline: Optional[float] = None
+) -> List[Candidate]:
+    """Titles with the most editions in the catalog."""
+    rows = _popular_rows(limit, deadline)
+    if not rows:
+        return []
+    top = rows[0][1]
+    candidates = []
+    for row, editions in rows:
+        candidate = Candidate(*row, popularity=editions / top)
+        candidate.sources["popular"] = f"Popular: {editions} editions in the catalog"
+        candidates.append(candidate)
+    return candidates
+
+
+def author_candidates(
+    seeds: List[Candidate], limit: int, deadline: Optional[float] = None
+) -> List[Candidate]:
+    """Other books by the main authors of the books already read.
+
+    Only the MAX_SEED_AUTHORS authors with the most books read are searched.
+    """
+    counts = Counter(_main_author(seed.authors) for seed in seeds)
+    counts.pop("", None)
+    authors = sorted(counts, key=lambda author: (-counts[author], author))[:MAX_SEED_AUTHORS]
+    if not authors:
+        return []
+    per_author = max(1, limit // len(authors))
+    candidates = []
+    for author in authors:
+        rows = _fetch(
+            """
+            SELECT id, title, authors, language_code FROM books
+            WHERE authors = ? OR authors LIKE ?
+            LIMIT ?
+            """,
+            (author, author + "/%", per_author),
+            deadline,
+        )
+        for row in rows:
+            candidate = Candidate(*row)
+            candidate.sources["author"] = f"Also by {author}"
+            candidates.append(candidate)
+    return candidates
+
+
+def language_candidates(
+    seeds: List[Candidate], limit: int, deadline: Optional[float] = None
+) -> List[Candidate]:
+    """A random slice of the catalog in the languages already read."""
+    languages = sorted({seed.language_code for seed in seeds} - {""})
+    if not languages:
+        return []
+    placeholders = ",".join("?" * len(languages))
+    query = f"""
+        SELECT id, title, authors, language_code FROM books
+        WHERE language_code IN ({placeholders}) AND id >= ?
+        ORDER BY id
+        LIMIT ?
+    """
+    max_id = _query("SELECT MAX(id) FROM books", (), deadline)[0][0] or 0
+    # Start at a random id instead of ORDER BY RANDOM(), which sorts the whole table
+    start = random.randint(0, max_id)
+    rows = _fetch(query, [*languages, start, limit], deadline)
+    if len(rows) < limit:
+        rows += [
+            row for row in _fetch(query, [*languages, 0, limit - len(rows)], deadline)
+            if row[0] < start
+        ]
+    candidates = []
+    for row in rows:
+        candidate = Candidate(*row)
+        candidate.sources["language"] = f"In a language you read ({row[3]})"
+        candidates.append(candidate)
+    return candidates
+
+
+def neighbor_candidates(
+    seeds: List[Candidate], limit: int, deadline: Optional[float] = None
+) -> List[Candidate]:
+    """Nearest neighbors of each book already read, from the ANN index."""
+    index = get_ann_index()
+    if index is None or not seeds:
+        return []
+    per_seed = max(1, limit // len(seeds))
+    seed_ids = [seed.book_id for seed in seeds]
+    reasons: Dict[int, str] = {}
+    for seed in seeds:
+        for book_id, _ in index.query(seed.features, k=per_seed, probes=DEFAULT_PROBES, exclude=seed_ids):
+            reasons.setdefault(book_id, f"Similar to '{seed.title}'")
+    if not reasons:
+        return []
+    ids = list(reasons)
+    placeholders = ",".join("?" * len(ids))
+    rows = _fetch(
+        f"SELECT id, title, authors, language_code FROM books WHERE id IN ({placeholders})",
+        ids,
+        deadline,
+    )
+    candidates = []
+    for row in rows:
+        candidate = Candidate(*row)
+        candidate.sources["neighbors"] = reasons[row[0]]
+        candidates.append(candidate)
+    return candidates
+
+
+GENERATORS: Dict[str, Generator] = {
+    "neighbors": neighbor_candidates,
+    "author": author_candidates,
+    "popular": popular_candidates,
+    "language": language_candidates,
+}
+
+
+def generate_candidates(
+    seeds: List[Candidate],
+    books_read: Sequence[str],
+    budget_ms: float,
+    limit: int = CANDIDATES_PER_SOURCE,
+) -> Tuple[List[Candidate], List[str]]:
+    """Run every generator and merge their candidates.
+
+    Pooled generators start first and run while the inline ones execute in
+    this thread. Every generator's SQL is interrupted at the deadline, and
+    inline generators not yet started by then are skipped. Pooled generators
+    still running when the budget expires are dropped, and those that never
+    started are cancelled so that work does not pile up in the pool under load.
+
+    Returns:
+        Tuple of (candidates, one title each, unread; names of dropped generators)
+    """
+    deadline = time.perf_counter() + budget_ms / 1000
+    futures = {
+        name: _executor.submit(generate, seeds, limit, deadline)
+        for name, generate in GENERATORS.items()
+        if name not in INLINE_GENERATORS
+    }
+    results: Dict[str, List[Candidate]] = {}
+    dropped = []
+    for name in INLINE_GENERATORS:
+        if time.perf_counter() > deadline:
+            dropped.append(name)
+            continue
+        try:
+            results[name] = GENERATORS[name](seeds, limit, deadline)
+        except DeadlineExceeded:
+            dropped.append(name)
+        except Exception as e:
+            print(f"Warning: Candidate generator '{name}' failed: {e}")
+    done, not_done = wait(futures.values(), timeout=max(0.0, deadline - time.perf_counter()))
+    for future in not_done:
+        future.cancel()
+
+    for name, future in futures.items():
+        if future not in done:
+            dropped.append(name)
+            continue
+        try:
+            results[name] = future.result()
+        except DeadlineExceeded:
+            dropped.append(name)
+        except Exception as e:
+            print(f"Warning: Candidate generator '{name}' failed: {e}")
+
+    read = {title.lower() for title in books_read}
+    merged: Dict[str, Candidate] = {}
+    # Merge in GENERATORS order so reasons and ties do not depend on timing
+    for name in GENERATORS:
+        for candidate in results.get(name, []):
+            key = candidate.title.lower()
+            if key in read:
+                continue
+            existing = merged.get(key)
+            if existing is None:
+                merged[key] = candidate
+            else:
+                existing.sources.update(candidate.sources)
+                existing.popularity = max(existing.popularity, candidate.popularity)
+    return list(merged.values()), dropped
+
+
+def score_candidates(
+    candidates: List[Candidate], seeds: List[Candidate], deadline: float
+) -> bool:
+    """Score candidates in place by content similarity to the read books plus priors.
+
+    Candidates are scored one at a time in pure Python (numpy is not a
+    dependency), checking the deadline every _BUDGET_CHECK_EVERY candidates.
+
+    Returns:
+        False if the deadline cut scoring short; the rest keep their prior score
+    """
+    for candidate in candidates:
+        candidate.score = (
+            sum(SOURCE_WEIGHTS.get(source, 0.0) for source in candidate.sources)
+            + POPULARITY_WEIGHT * candidate.popularity
+        )
+    if not seeds:
+        return True
+    seed_features = [seed.features for seed in seeds]
+    for i, candidate in enumerate(candidates):
+        if i % _BUDGET_CHECK_EVERY == 0 and time.perf_counter() > deadline:
+            return False
+        candidate.score += max(cosine(candidate.features, f) for f in seed_features)
+    return True
+
+
+def mmr_rerank(
+    candidates: List[Candidate], n: int, deadline: float, mmr_lambda: float = MMR_LAMBDA
+) -> Tuple[List[Candidate], bool]:
+    """Pick n candidates by maximal marginal relevance.
+
+    Returns:
+        Tuple of (selected candidates, False if the deadline forced the
+        remaining picks to plain score order)
+    """
+    pool = sorted(candidates, key=lambda c: c.score, reverse=True)
+    # Relevance on the same 0..1 scale as the cosine similarity it is traded against
+    top_score = pool[0].score if pool and pool[0].score > 0 else 1.0
+    relevance = [c.score / top_score for c in pool]
+    selected: List[Candidate] = []
+    # Highest similarity of each pool entry to anything already selected
+    max_similarity = [0.0] * len(pool)
+    remaining = list(range(len(pool)))
+    on_time = True
+    while remaining and len(selected) < n:
+        if time.perf_counter() > deadline:
+            on_time = False
+            selected.extend(pool[i] for i in remaining[: n - len(selected)])
+            break
+        best = max(
+            remaining,
+            key=lambda i: mmr_lambda * relevance[i] - (1 - mmr_lambda) * max_similarity[i],
+        )
+        remaining.remove(best)
+        chosen = pool[best]
+        selected.append(chosen)
+        for i in remaining:
+            similarity = cosine(chosen.features, pool[i].features)
+            if similarity > max_similarity[i]:
+                max_similarity[i] = similarity
+    return selected, on_time
+
+
+def recommend_books(
+    books_read: Optional[List[str]] = None,
+    n: int = 5,
+    budgets_ms: Optional[Dict[str, float]] = None,
+) -> RankedRecommendations:
+    """Recommend the top-n unread books with reasons.
+
+    Args:
+        books_read: Titles already read (case-insensitive)
+        n: Number of recommendations
+        budgets_ms: Per-stage time budgets overriding STAGE_BUDGETS_MS
+
+    Returns:
+        RankedRecommendations with recommendations, timings and degraded stages
+    """
+    books_read = books_read or []
+    budgets = {**STAGE_BUDGETS_MS, **(budgets_ms or {})}
+    timings: Dict[str, float] = {}
+    degraded: List[str] = []
+
+    start = time.perf_counter()
+    try:
+        seeds = find_seeds(books_read, start + budgets["seeds"] / 1000)
+    except DeadlineExceeded:
+        # Carry on without personalization: popular titles need no seeds
+        seeds = []
+        degraded.append("seeds")
+    timings["seeds"] = (time.perf_counter() - start) * 1000
+
+    stage_start = time.perf_counter()
+    # Identical read sets arriving together (e.g. cold-start bursts) share one run
+    read_key = ("candidates", catalog_version(), tuple(sorted({t.lower() for t in books_read})))
+    shared, dropped = _flights.do(
+        read_key, lambda: generate_candidates(seeds, books_read, budgets["candidates"])
+    )
+    candidates = [candidate.copy() for candidate in shared]
+    timings["candidates"] = (time.perf_counter() - stage_start) * 1000
+    degraded.extend(f"candidates:{name}" for name in dropped)
+
+    stage_start = time.perf_counter()
+    if not score_candidates(candidates, seeds, stage_start + budgets["scoring"] / 1000):
+        degraded.append("scoring")
+    timings["scoring"] = (time.perf_counter() - stage_start) * 1000
+
+    stage_start = time.perf_counter()
+    selected, on_time = mmr_rerank(candidates, n, stage_start + budgets["rerank"] / 1000)
+    if not on_time:
+        degraded.append("rerank")
+    timings["rerank"] = (time.perf_counter() - stage_start) * 1000
+    timings["total"] = (time.perf_counter() - start) * 1000
+
+    recommendations = [
+        Recommendation(
+            title=c.title,
+            authors=c.authors,
+            score=round(c.score, 4),
+            reasons=[c.sources[name] for name in GENERATORS if name in c.sources],
+        )
+        for c in selected
+    ]
+    return RankedRecommendations(
+        recommendations=recommendations,
+        timings_ms={stage: round(ms, 3) for stage, ms in timings.items()},
+        degraded=degraded,
+    )
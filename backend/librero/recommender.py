@@ -1,8 +1,11 @@
 import random
+import threading
 from dataclasses import dataclass
-from typing import List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
 
-from .db import get_connection
+from .ann import DEFAULT_PROBES, INDEX_PATH, AnnIndex, book_features, cosine
+from .db import catalog_version, file_version, get_connection
+from .singleflight import SingleFlight
 
 
 # Sample data of Albert Camus' works
@@ -12,6 +15,9 @@ class Book:
     year: int
     genre: str
 
+# Columns that can be exported, in table order
+BOOK_FIELDS: Tuple[str, ...] = ("id", "title", "authors", "language_code", "isbn", "publication_date")
+
 # Default books in case database is not available
 CAMUS_BOOKS: List[Book] = [
     Book(title="The Stranger", year=1942, genre="Absurdist fiction"),
@@ -23,15 +29,61 @@ CAMUS_BOOKS: List[Book] = [
     Book(title="A Happy Death", year=1971, genre="Philosophical fiction"),
 ]
 
+# Coalesces concurrent catalog loads and index opens
+_flights = SingleFlight()
+
+# Book lists per limit for the catalog version in _catalog_version
+_catalog_pages: Dict[int, List[Tuple[str, str]]] = {}
+_catalog_version: Optional[Tuple[int, int]] = None
+_catalog_lock = threading.Lock()
+# Largest limit whose result is cached; bigger and negative (unlimited) ones are not
+MAX_CACHED_LIMIT = 1000
+
 def get_books_from_db(limit: int = 10) -> List[Tuple[str, str]]:
     """Get books from the database.
 
+    Results are cached until books.db changes, and concurrent misses with the
+    same limit share a single query, so a burst of requests after a deploy or
+    reload does not stampede books.db.
+
     Args:
         limit: Maximum number of books to return
 
     Returns:
-        List of tuples containing (title, authors)
+        List of tuples containing (title, authors); callers must not modify it.
+        The default books if the database could not be read.
+    """
+    rows = query_books(limit)
+    return fallback_books(limit) if rows is None else rows
+
+def query_books(limit: int = 10) -> Optional[List[Tuple[str, str]]]:
+    """Like get_books_from_db(), but None instead of the default books on failure.
+
+    Lets callers that cache what they build from the result (such as encoded
+    responses) tell fallback data apart.
     """
+    global _catalog_version
+    version = catalog_version()
+    with _catalog_lock:
+        if version != _catalog_version:
+            _catalog_pages.clear()
+            _catalog_version = version
+        rows = _catalog_pages.get(limit)
+    if rows is not None:
+        return rows
+
+    rows = _flights.do(("books", version, limit), lambda: _query_books(limit))
+    if rows is not None and version is not None and 0 < limit <= MAX_CACHED_LIMIT:
+        with _catalog_lock:
+            if version == _catalog_version:
+                _catalog_pages[limit] = rows
+    return rows
+
+def fallback_books(limit: int = 10) -> List[Tuple[str, str]]:
+    """Default books served when the database cannot be read."""
+    return [(book.title, "Albert Camus") for book in CAMUS_BOOKS[:limit]]
+
+def _query_books(limit: int) -> Optional[List[Tuple[str, str]]]:
     con = None
     try:
         con = get_connection()
@@ -93,8 +145,173 @@ def get_books_from_db(limit: int = 10) -> List[Tuple[str, str]]:
 
     except Exception as e:
         print(f"Error accessing database: {e}")
-        # Fall back to default books if database access fails
-        return [(book.title, "Albert Camus") for book in CAMUS_BOOKS[:limit]]
+        return None
+    finally:
+        if con:
+            con.close()
+
+def iter_books(
+    fields: Sequence[str] = BOOK_FIELDS,
+    language_code: Optional[str] = None,
+    author: Optional[str] = None,
+    batch_size: int = 1000,
+) -> Iterator[List[Tuple]]:
+    """Stream the whole catalog in batches, paging through it by id.
+
+    Each batch is a separate ``WHERE id > ? ORDER BY id LIMIT ?`` query, so
+    memory stays constant whatever the catalog size, and no read lock is held
+    while the consumer processes a batch; a slow export never blocks writers.
+    The export is therefore not a point-in-time snapshot: every book appears
+    at most once and in id order, but books written during the export may or
+    may not be included.
+
+    Args:
+        fields: Columns to return, a subset of BOOK_FIELDS
+        language_code: Only books in this language
+        author: Only books whose authors contain this text (case-insensitive)
+        batch_size: Rows fetched per batch
+
+    Yields:
+        Lists of row tuples with the requested fields
+
+    Raises:
+        ValueError: If an unknown field is requested
+    """
+    unknown = [name for name in fields if name not in BOOK_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+
+    conditions = ["id > ?"]
+    params: List[str] = []
+    if language_code:
+        conditions.append("language_code = ?")
+        params.append(language_code)
+    if author:
+        conditions.append("authors LIKE ?")
+        params.append(f"%{author}%")
+
+    query = f"""
+        SELECT id, {', '.join(fields)} FROM books
+        WHERE {' AND '.join(conditions)}
+        ORDER BY id
+        LIMIT ?
+    """
+
+    # The generator may be resumed from different threads (e.g. a web server's
+    # thread pool), but never from two at once
+    con = get_connection(check_same_thread=False)
+    try:
+        last_id = -1
+        while True:
+            # fetchall() completes the statement, releasing its shared lock
+            rows = con.execute(query, [last_id, *params, batch_size]).fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            yield [row[1:] for row in rows]
+    finally:
+        con.close()
+
+# Similarity index, memory-mapped on first use, and the file version it was opened at
+_ann_index: Optional[AnnIndex] = None
+_ann_index_version: Optional[Tuple[int, int]] = None
+
+def get_ann_index() -> Optional[AnnIndex]:
+    """Open the similarity index built by ``librero/script/build_index.py``.
+
+    The index is reopened when the file is rebuilt. The previous one is not
+    closed, since in-flight queries may still read it; it is unmapped once
+    nothing references it.
+
+    Returns:
+        The memory-mapped AnnIndex, or None if it has not been built
+    """
+    version = file_version(INDEX_PATH)
+    if version is not None and version != _ann_index_version:
+        _flights.do(("ann_index", version), _open_ann_index)
+    return _ann_index
+
+def _open_ann_index() -> None:
+    global _ann_index, _ann_index_version
+    version = file_version(INDEX_PATH)
+    if version is None or version == _ann_index_version:
+        return
+    try:
+        _ann_index = AnnIndex(INDEX_PATH)
+    except (OSError, ValueError) as e:
+        print(f"Warning: Could not open similarity index: {e}")
+    # Also on failure, so a broken file is not reopened on every call
+    _ann_index_version = version
+
+def ann_index_is_stale() -> bool:
+    """Whether books.db changed after the similarity index was built.
+
+    The index is built offline; rebuild it with ``make index``.
+    """
+    index_version = file_version(INDEX_PATH)
+    catalog = catalog_version()
+    return index_version is not None and catalog is not None and index_version[0] < catalog[0]
+
+def get_similar_books(
+    title: str, limit: int = 5, probes: int = DEFAULT_PROBES
+) -> List[Tuple[str, str]]:
+    """Find the books most similar to a title using the ANN index.
+
+    Args:
+        title: Title of a book in the database (case-insensitive)
+        limit: Maximum number of books to return
+        probes: Extra buckets searched per band; raise for recall, lower for latency
+
+    Returns:
+        List of tuples containing (title, authors), most similar first.
+        Empty if the index or the title is not available.
+    """
+    index = get_ann_index()
+    if index is None:
+        return []
+
+    con = None
+    try:
+        con = get_connection()
+        cur = con.cursor()
+        row = cur.execute("""
+            SELECT id, title, authors, language_code FROM books
+            WHERE lower(title) = lower(?)
+            LIMIT 1
+        """, (title,)).fetchone()
+        if not row:
+            return []
+        book_id, book_title, authors, language_code = row
+
+        # Over-fetch, then re-rank the candidates by exact cosine similarity;
+        # the catalog also has several editions of the same title
+        features = book_features(book_title, authors or "", language_code or "")
+        neighbors = index.query(features, k=limit * 4, probes=probes, exclude=[book_id])
+        if not neighbors:
+            return []
+        ids = [neighbor_id for neighbor_id, _ in neighbors]
+        placeholders = ",".join("?" * len(ids))
+        candidates = cur.execute(f"""
+            SELECT title, authors, language_code FROM books
+            WHERE id IN ({placeholders})
+        """, ids).fetchall()
+        candidates.sort(
+            key=lambda c: cosine(features, book_features(c[0], c[1] or "", c[2] or "")),
+            reverse=True,
+        )
+
+        similar: List[Tuple[str, str]] = []
+        seen = {book_title.lower()}
+        for candidate_title, candidate_authors, _ in candidates:
+            if candidate_title.lower() not in seen:
+                seen.add(candidate_title.lower())
+                similar.append((candidate_title, candidate_authors))
+                if len(similar) >= limit:
+                    break
+        return similar
+    except Exception as e:
+        print(f"Warning: Error finding similar books: {e}")
+        return []
     finally:
         if con:
             con.close()
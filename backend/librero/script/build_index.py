@@ -0,0 +1,42 @@
+import sqlite3
+import time
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+
+from librero.ann import AnnIndex, Features, book_features
+
+# Paths
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+DB_PATH = DATA_DIR / "books.db"
+INDEX_PATH = DATA_DIR / "books.ann"
+
+
+def iter_features(db_path: Path = DB_PATH) -> Iterator[Tuple[int, Features]]:
+    """Stream (book_id, features) for every book in the database."""
+    con = sqlite3.connect(db_path)
+    try:
+        cur = con.execute("SELECT id, title, authors, language_code FROM books")
+        for book_id, title, authors, language_code in cur:
+            yield book_id, book_features(title or "", authors or "", language_code or "")
+    finally:
+        con.close()
+
+
+def build_index(
+    db_path: Path = DB_PATH,
+    index_path: Path = INDEX_PATH,
+    band_bits: Optional[int] = None,
+) -> AnnIndex:
+    """Build the similarity index for books.db and write it next to it."""
+    start = time.perf_counter()
+    index = AnnIndex.build(iter_features(db_path), str(index_path), band_bits=band_bits)
+    elapsed = time.perf_counter() - start
+    print(
+        f"✅ Indexed {len(index)} books into {index_path} "
+        f"({index.n_bands} bands x {index.band_bits} bits, {elapsed:.1f}s)"
+    )
+    return index
+
+
+if __name__ == "__main__":
+    build_index().close()
@@ -1,11 +1,20 @@
 import csv
+import os
+import queue
 import sqlite3
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date
 from pathlib import Path
+from typing import Deque, List, Optional, Sequence, Tuple
 
 # Paths
 DATA_DIR = Path(__file__).resolve().parent.parent / "data"
 CSV_PATH = DATA_DIR / "books.csv"     # put your Kaggle CSV here
 DB_PATH = DATA_DIR / "books.db"
+QUARANTINE_PATH = DATA_DIR / "books.rejected.csv"
 
 # Schema we want (simple, no ratings/num_pages/etc.)
 SCHEMA = """
@@ -19,6 +28,32 @@ CREATE TABLE IF NOT EXISTS books (
 );
 """
 
+INSERT_SQL = """
+    INSERT INTO books (title, authors, language_code, isbn, publication_date)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
+# Columns copied into the database, in INSERT order
+COLUMNS = ("title", "authors", "language_code", "isbn", "publication_date")
+
+# Ingest tuning: bytes per parse task and parsed chunks buffered for the writer
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+DEFAULT_QUEUE_SIZE = 8
+
+BookRow = Tuple[str, str, str, str, str]
+# (byte offset of the record, reason, raw line)
+Rejection = Tuple[int, str, str]
+
+
+@dataclass
+class IngestStats:
+    """Counters reported by a load_data() run."""
+    loaded: int = 0
+    rejected: int = 0
+    chunks: int = 0
+    reasons: dict = field(default_factory=dict)
+
+
 def create_db():
     con = sqlite3.connect(DB_PATH)
     cur = con.cursor()
@@ -27,35 +62,259 @@ def create_db():
     con.close()
     print(f"✅ Database ready at {DB_PATH}")
 
-from typing import Optional
 
-def load_data(limit: Optional[int] = None):
-    con = sqlite3.connect(DB_PATH)
-    cur = con.cursor()
+def read_header(csv_path: Path) -> Tuple[List[str], int]:
+    """Read the CSV header.
 
-    with open(CSV_PATH, newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for i, row in enumerate(reader, start=1):
-            cur.execute(
-                """
-                INSERT INTO books (title, authors, language_code, isbn, publication_date)
-                VALUES (?, ?, ?, ?, ?)
-                """,
-                (
-                    row["title"],
-                    row["authors"],
-                    row["language_code"],
-                    row["isbn"],
-                    row["publication_date"],
-                ),
-            )
-            if limit and i >= limit:
-                break
+    Column names are stripped, so the dump's ``  num_pages`` becomes ``num_pages``.
+
+    Returns:
+        Tuple of (column names, byte offset where the first record starts)
+    """
+    with open(csv_path, "rb") as f:
+        first_line = f.readline()
+        header = next(csv.reader([first_line.decode("utf-8-sig")]))
+        return [name.strip() for name in header], f.tell()
+
+
+def chunk_boundaries(csv_path: Path, start: int, chunk_size: int) -> List[Tuple[int, int]]:
+    """Split a file into byte ranges that begin and end on record boundaries.
+
+    Each tentative boundary is moved forward to the next newline, so no record
+    is ever split between two chunks. Records are assumed to be one line each,
+    which holds for the books dump (it has no quoted multi-line fields).
+
+    Args:
+        csv_path: File to split
+        start: Byte offset of the first record (just past the header)
+        chunk_size: Approximate number of bytes per chunk
+
+    Returns:
+        List of (start, end) byte offsets covering [start, EOF)
+    """
+    size = os.path.getsize(csv_path)
+    boundaries = []
+    with open(csv_path, "rb") as f:
+        while start < size:
+            end = min(start + chunk_size, size)
+            if end < size:
+                f.seek(end)
+                f.readline()
+                end = f.tell()
+            boundaries.append((start, end))
+            start = end
+    return boundaries
+
+
+def normalize_date(value: str) -> str:
+    """Convert the dump's ``M/D/YYYY`` dates to ISO ``YYYY-MM-DD``.
+
+    Raises:
+        ValueError: If the value is not a valid calendar date
+    """
+    month, day, year = value.strip().split("/")
+    return date(int(year), int(month), int(day)).isoformat()
+
+
+def validate_row(fields: Sequence[str], header: Sequence[str]) -> BookRow:
+    """Validate one parsed CSV record and map it to a database row.
+
+    Raises:
+        ValueError: With the rejection reason if the record is malformed
+    """
+    if len(fields) != len(header):
+        raise ValueError(f"expected {len(header)} fields, got {len(fields)}")
+    row = dict(zip(header, fields))
+    if not row["title"].strip():
+        raise ValueError("missing title")
+    if not row["authors"].strip():
+        raise ValueError("missing authors")
+    try:
+        publication_date = normalize_date(row["publication_date"])
+    except ValueError:
+        raise ValueError(f"invalid publication_date {row['publication_date']!r}")
+    return (
+        row["title"],
+        row["authors"],
+        row["language_code"],
+        row["isbn"],
+        publication_date,
+    )
+
+
+def parse_chunk(
+    csv_path: Path, start: int, end: int, header: Sequence[str]
+) -> Tuple[List[BookRow], List[Rejection]]:
+    """Parse and validate the records in one byte range of the CSV.
+
+    Runs inside a worker process, so it only takes picklable arguments.
+
+    Returns:
+        Tuple of (accepted rows, rejected records)
+    """
+    rows: List[BookRow] = []
+    rejected: List[Rejection] = []
+    with open(csv_path, "rb") as f:
+        f.seek(start)
+        offset = start
+        while offset < end:
+            raw = f.readline()
+            line = raw.decode("utf-8", errors="replace").rstrip("\r\n")
+            if line.strip():
+                try:
+                    rows.append(validate_row(next(csv.reader([line])), header))
+                except (ValueError, csv.Error) as e:
+                    rejected.append((offset, str(e), line))
+            offset += len(raw)
+    return rows, rejected
+
+
+def _write_batches(
+    db_path: Path,
+    quarantine_path: Path,
+    batches: "queue.Queue[Optional[Tuple[List[BookRow], List[Rejection]]]]",
+    stats: IngestStats,
+    limit: Optional[int],
+    done: threading.Event,
+    errors: List[BaseException],
+) -> None:
+    """Drain parsed chunks from the queue into SQLite and the quarantine file.
+
+    A failure (missing table, locked database, full disk) is appended to
+    ``errors`` and stops the load instead of killing the thread silently.
+    """
+    con = sqlite3.connect(db_path)
+    try:
+        cur = con.cursor()
+        with open(quarantine_path, "w", newline="", encoding="utf-8") as qf:
+            quarantine = csv.writer(qf)
+            quarantine.writerow(["offset", "reason", "record"])
+            while True:
+                batch = batches.get()
+                if batch is None:
+                    break
+                if done.is_set():
+                    # Limit reached: keep draining so the producer never blocks
+                    continue
+                rows, rejected = batch
+                if limit is not None:
+                    rows = rows[: limit - stats.loaded]
+                cur.executemany(INSERT_SQL, rows)
+                stats.loaded += len(rows)
+                stats.chunks += 1
+                for offset, reason, line in rejected:
+                    quarantine.writerow([offset, reason, line])
+                    key = reason.split(" '")[0]
+                    stats.reasons[key] = stats.reasons.get(key, 0) + 1
+                stats.rejected += len(rejected)
+                if limit is not None and stats.loaded >= limit:
+                    done.set()
+        con.commit()
+    except BaseException as e:
+        errors.append(e)
+        done.set()
+    finally:
+        con.close()
+
+
+def _put(
+    batches: "queue.Queue[Optional[Tuple[List[BookRow], List[Rejection]]]]",
+    item: Optional[Tuple[List[BookRow], List[Rejection]]],
+    writer: threading.Thread,
+) -> None:
+    """Queue an item for the writer, giving up if the writer has stopped."""
+    while writer.is_alive():
+        try:
+            batches.put(item, timeout=0.1)
+            return
+        except queue.Full:
+            continue
+
+
+def load_data(
+    limit: Optional[int] = None,
+    workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    csv_path: Path = CSV_PATH,
+    db_path: Path = DB_PATH,
+    quarantine_path: Path = QUARANTINE_PATH,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+) -> IngestStats:
+    """Load the books CSV into the database.
+
+    The file is split into record-aligned byte ranges that are parsed and
+    validated in parallel across a process pool. Parsed chunks are handed, in
+    file order, to a single writer thread through a bounded queue, so memory
+    stays flat no matter how far the parsers get ahead of SQLite. Rejected
+    records are written to ``quarantine_path`` with the reason.
+
+    Args:
+        limit: Maximum number of rows to insert (default: all)
+        workers: Number of parser processes (default: CPU count); 1 parses in-process
+        chunk_size: Approximate bytes per parse task
+        csv_path: Source CSV file
+        db_path: SQLite database to insert into
+        quarantine_path: CSV file receiving rejected records
+        queue_size: Maximum parsed chunks waiting for the writer
+
+    Returns:
+        IngestStats with loaded/rejected counts
+
+    Raises:
+        ValueError: If the CSV lacks a required column
+        sqlite3.Error: If the writer fails to insert into the database
+    """
+    header, data_start = read_header(csv_path)
+    missing = [name for name in COLUMNS if name not in header]
+    if missing:
+        raise ValueError(f"CSV is missing required column(s): {', '.join(missing)}")
+
+    ranges = chunk_boundaries(csv_path, data_start, chunk_size)
+    workers = workers or os.cpu_count() or 1
+
+    stats = IngestStats()
+    done = threading.Event()
+    errors: List[BaseException] = []
+    batches: "queue.Queue[Optional[Tuple[List[BookRow], List[Rejection]]]]" = queue.Queue(
+        maxsize=queue_size
+    )
+    writer = threading.Thread(
+        target=_write_batches,
+        args=(db_path, quarantine_path, batches, stats, limit, done, errors),
+    )
+    writer.start()
+    try:
+        if workers == 1 or len(ranges) <= 1:
+            for start, end in ranges:
+                if done.is_set():
+                    break
+                _put(batches, parse_chunk(csv_path, start, end, header), writer)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                # Keep a bounded window of in-flight chunks, consumed in file order
+                pending: Deque[Future] = deque()
+                for start, end in ranges:
+                    if done.is_set():
+                        break
+                    pending.append(pool.submit(parse_chunk, csv_path, start, end, header))
+                    if len(pending) >= workers * 2:
+                        _put(batches, pending.popleft().result(), writer)
+                while pending and not done.is_set():
+                    _put(batches, pending.popleft().result(), writer)
+                for future in pending:
+                    future.cancel()
+    finally:
+        _put(batches, None, writer)
+        writer.join()
+    if errors:
+        raise errors[0]
+
+    print(f"✅ Loaded {stats.loaded} rows into {db_path}")
+    if stats.rejected:
+        print(f"⚠️  Rejected {stats.rejected} rows, see {quarantine_path}")
+    return stats
 
-    con.commit()
-    con.close()
-    print(f"✅ Loaded {i} rows into {DB_PATH}")
 
 if __name__ == "__main__":
     create_db()
-    load_data()  
+    load_data()
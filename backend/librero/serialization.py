@@ -0,0 +1,85 @@
+"""Fast JSON encoding and pre-encoded payloads for hot API responses."""
+import json
+import threading
+from collections import OrderedDict
+from types import ModuleType
+from typing import Any, Callable, Hashable, Optional
+
+from .db import catalog_version
+from .singleflight import SingleFlight
+
+orjson: Optional[ModuleType]
+try:
+    import orjson
+except ImportError:  # optional speed-up, the standard library encoder is the fallback
+    orjson = None
+
+# Pre-encoded payloads kept per catalog version
+PAYLOAD_CACHE_SIZE = 64
+
+
+def dumps(content: Any) -> bytes:
+    """Encode JSON-compatible data to compact UTF-8 JSON bytes.
+
+    Produces the same bytes as FastAPI's default JSONResponse for plain
+    dicts, lists, strings and numbers, using orjson when it is installed.
+    """
+    if orjson is not None:
+        encoded: bytes = orjson.dumps(content)
+        return encoded
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def _dumps_or_none(content: Any) -> Optional[bytes]:
+    return None if content is None else dumps(content)
+
+
+class PayloadCache:
+    """Encoded response bodies that are dropped whenever the catalog changes.
+
+    Entries are keyed by whatever identifies the response (e.g. a page size)
+    and evicted least-recently-used beyond ``max_entries``. Concurrent misses
+    for the same key share one build. Nothing is cached while the database
+    file is missing or when the build reports its data unavailable, so
+    fallback data never sticks.
+    """
+
+    def __init__(self, max_entries: int = PAYLOAD_CACHE_SIZE) -> None:
+        self.max_entries = max_entries
+        self._payloads: "OrderedDict[Hashable, bytes]" = OrderedDict()
+        self._version: Optional[tuple] = None
+        self._lock = threading.Lock()
+        self._flights = SingleFlight()
+
+    def get_or_build(self, key: Hashable, build: Callable[[], Any]) -> Optional[bytes]:
+        """Return the cached payload for key, encoding ``build()`` on a miss.
+
+        ``build`` returns None when its data is unavailable (e.g. books.db
+        could not be read); then nothing is cached and None is returned.
+        """
+        version = catalog_version()
+        with self._lock:
+            if version != self._version:
+                self._payloads.clear()
+                self._version = version
+            payload = self._payloads.get(key)
+            if payload is not None:
+                self._payloads.move_to_end(key)
+                return payload
+
+        payload = self._flights.do((version, key), lambda: _dumps_or_none(build()))
+        if payload is not None and version is not None:
+            with self._lock:
+                if version == self._version:
+                    self._payloads[key] = payload
+                    if len(self._payloads) > self.max_entries:
+                        self._payloads.popitem(last=False)
+        return payload
+
+    def clear(self) -> None:
+        """Drop every cached payload."""
+        with self._lock:
+            self._payloads.clear()
+            self._version = None
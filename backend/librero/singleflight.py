@@ -0,0 +1,55 @@
+"""Request coalescing: concurrent callers of the same expensive computation share one run."""
+import threading
+from typing import Callable, Dict, Hashable, Optional, TypeVar, cast
+
+T = TypeVar("T")
+
+
+class _Call:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: object = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Collapse concurrent calls that use the same key into a single execution.
+
+    The first caller for a key runs the function; callers that arrive while it
+    is still running wait for it and get the same result (or exception).
+    Nothing is cached afterwards: the next call after completion runs again,
+    so pair it with a cache when results should outlive the burst.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        # Number of calls that were served by another caller's run
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        """Run fn for key, or wait for the run already in flight."""
+        with self._lock:
+            running = self._calls.get(key)
+            if running is None:
+                call = self._calls[key] = _Call()
+            else:
+                call = running
+                self.coalesced += 1
+
+        if running is not None:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return cast(T, call.result)
+
+        try:
+            result = call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return result
@@ -0,0 +1,128 @@
+"""Start-up warm-up and readiness tracking.
+
+A WarmUp runs a list of named steps that fill the caches and open the indexes
+that requests depend on. It reports ready only once every step has succeeded
+for the current catalog version; when books.db changes, the next readiness
+check starts a new warm-up and reports not ready until it finishes. Failed
+warm-ups are retried on the next check. Steps that only degrade an optional
+feature, such as a missing or stale similarity index, are reported as
+degraded without blocking readiness.
+"""
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from .db import catalog_version
+from .pipeline import CANDIDATES_PER_SOURCE, popular_candidates, recommend_books
+from .recommender import ann_index_is_stale, get_ann_index, get_books_from_db
+
+Step = Tuple[str, Callable[[], object]]
+
+
+class StepDegraded(Exception):
+    """Raised by a warm-up step that ran but left an optional feature degraded.
+
+    Unlike a failure, it does not keep the service from reporting ready.
+    """
+
+
+def open_ann_index() -> None:
+    """Open the similarity index, reporting a missing or stale one.
+
+    The index is built offline (``make index``), never during warm-up.
+    """
+    if get_ann_index() is None:
+        raise StepDegraded("index not built; run make index")
+    if ann_index_is_stale():
+        raise StepDegraded("index is older than books.db; run make index")
+
+
+def default_steps() -> List[Step]:
+    """Warm-up steps for the library's own caches, cheapest first."""
+    return [
+        ("catalog", get_books_from_db),
+        ("ann_index", open_ann_index),
+        ("popular", lambda: popular_candidates([], CANDIDATES_PER_SOURCE)),
+        ("pipeline", lambda: recommend_books([])),
+    ]
+
+
+class WarmUp:
+    """Runs warm-up steps and tracks whether the service is ready."""
+
+    def __init__(self, steps: Sequence[Step]) -> None:
+        self.steps = list(steps)
+        self.ready = False
+        self.status: Dict[str, str] = {name: "pending" for name, _ in self.steps}
+        self.timings_ms: Dict[str, float] = {}
+        self.version: Optional[tuple] = None
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def run(self) -> bool:
+        """Run every step in order, recording status and timings.
+
+        Returns:
+            True if all steps succeeded
+        """
+        version = catalog_version()
+        with self._lock:
+            self.ready = False
+            self.status = {name: "pending" for name, _ in self.steps}
+            self.timings_ms = {}
+        ok = True
+        for name, step in self.steps:
+            start = time.perf_counter()
+            try:
+                step()
+                status = "ok"
+            except StepDegraded as e:
+                print(f"Warning: Warm-up step '{name}' degraded: {e}")
+                status = f"degraded: {e}"
+            except Exception as e:
+                print(f"Warning: Warm-up step '{name}' failed: {e}")
+                status = f"failed: {e}"
+                ok = False
+            with self._lock:
+                self.status[name] = status
+                self.timings_ms[name] = round((time.perf_counter() - start) * 1000, 3)
+        with self._lock:
+            self.version = version
+            self.ready = ok
+        return ok
+
+    def start(self) -> None:
+        """Run the warm-up in a background thread, unless one is already running."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self.ready = False
+            self._thread = threading.Thread(target=self.run, name="librero-warmup", daemon=True)
+            self._thread.start()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the running warm-up finishes; returns readiness."""
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        return self.ready
+
+    def is_ready(self) -> bool:
+        """Whether the caches are warm for the current catalog.
+
+        Starts a new warm-up if books.db changed since the last one, or if the
+        last one failed.
+        """
+        if self.version is not None and (not self.ready or catalog_version() != self.version):
+            self.start()
+        return self.ready
+
+    def report(self) -> Dict[str, object]:
+        """Readiness status with per-step status and timings."""
+        ready = self.is_ready()
+        with self._lock:
+            return {
+                "status": "ready" if ready else "warming_up",
+                "steps": dict(self.status),
+                "timings_ms": dict(self.timings_ms),
+            }
@@ -0,0 +1,80 @@
+"""Tests for the librero.ann similarity index."""
+
+import pytest
+from librero.ann import AnnIndex, book_features, cosine, projections, signature
+
+BOOKS = [
+    (1, "The Stranger", "Albert Camus/Matthew Ward", "eng"),
+    (2, "The Plague", "Albert Camus/Robin Buss", "eng"),
+    (3, "The Fall", "Albert Camus", "eng"),
+    (4, "The Myth of Sisyphus", "Albert Camus", "eng"),
+    (5, "The Hobbit", "J.R.R. Tolkien", "eng"),
+    (6, "The Silmarillion", "J.R.R. Tolkien/Christopher Tolkien", "eng"),
+    (7, "The Fellowship of the Ring", "J.R.R. Tolkien", "eng"),
+    (8, "Pride and Prejudice", "Jane Austen", "eng"),
+    (9, "Emma", "Jane Austen", "eng"),
+    (10, "Cien años de soledad", "Gabriel García Márquez", "spa"),
+]
+
+
+@pytest.fixture
+def index(tmp_path):
+    items = ((book_id, book_features(t, a, lang)) for book_id, t, a, lang in BOOKS)
+    idx = AnnIndex.build(items, str(tmp_path / "books.ann"), band_bits=8)
+    yield idx
+    idx.close()
+
+
+def test_book_features_are_normalized():
+    """Test that feature vectors have unit length and share the author feature."""
+    stranger = book_features("The Stranger", "Albert Camus", "eng")
+    plague = book_features("The Plague", "Albert Camus", "eng")
+    hobbit = book_features("The Hobbit", "J.R.R. Tolkien", "eng")
+    assert cosine(stranger, stranger) == pytest.approx(1.0)
+    assert cosine(stranger, plague) > cosine(stranger, hobbit)
+
+
+def test_signature_matches_projection_signs():
+    """Test that the fast signature agrees with the sign of each projection."""
+    features = book_features("The Myth of Sisyphus", "Albert Camus/Justin O'Brien", "eng")
+    expected = sum(1 << j for j, value in enumerate(projections(features)) if value > 0)
+    assert signature(features) == expected
+
+
+def test_index_round_trip(index):
+    """Test that the memory-mapped index exposes what was written."""
+    assert len(index) == len(BOOKS)
+    features = book_features("The Fall", "Albert Camus", "eng")
+    assert index.signature_of(3) == signature(features)
+    assert index.signature_of(42) is None
+
+
+def test_query_finds_same_author(index):
+    """Test that a query ranks the book itself first and its author's books next."""
+    features = book_features("The Fall", "Albert Camus", "eng")
+    results = index.query(features, k=4, probes=8)
+    assert results[0] == (3, 0)
+    assert results[1][0] in {1, 2, 4}
+    assert [d for _, d in results] == sorted(d for _, d in results)
+
+
+def test_query_excludes_ids(index):
+    """Test that excluded ids never appear in the results."""
+    features = book_features("The Fall", "Albert Camus", "eng")
+    results = index.query(features, k=10, probes=8, exclude=[3])
+    assert 3 not in {book_id for book_id, _ in results}
+
+
+def test_query_rejects_negative_probes(index):
+    """Test that a negative probe count is an error rather than a huge probe."""
+    features = book_features("The Fall", "Albert Camus", "eng")
+    with pytest.raises(ValueError):
+        index.query(features, probes=-1)
+
+
+def test_invalid_index_file(tmp_path):
+    """Test that opening a file that is not an index fails clearly."""
+    path = tmp_path / "books.ann"
+    path.write_bytes(b"not an index" * 4)
+    with pytest.raises(ValueError):
+        AnnIndex(str(path))
@@ -1,4 +1,13 @@
 """Tests for the web API endpoints."""
+import asyncio
+import csv
+import io
+import json
+import time
+from unittest.mock import patch
+
+import httpx
+
 from app import app
 from fastapi.testclient import TestClient
 
@@ -12,6 +21,22 @@ def test_health_check():
     assert response.json() == {"status": "healthy", "service": "librero-recommender"}
 
 
+def test_readiness_check():
+    """Test that /ready reports ready once the start-up warm-up has finished."""
+    from app import warmup
+
+    with TestClient(app) as started_client:
+        assert warmup.wait(30)
+        response = started_client.get("/ready")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "ready"
+    # Without a built similarity index the ann_index step is only degraded
+    assert all(status == "ok" or status.startswith("degraded") for status in data["steps"].values())
+    assert data["steps"]["catalog"] == "ok"
+    assert "book_pages" in data["timings_ms"]
+
+
 def test_get_recommendation_no_books():
     """Test getting a recommendation with no books read."""
     response = client.post("/api/recommend", json={"books_read": []})
@@ -91,3 +116,125 @@ def test_get_recommendation_unknown_book():
     assert "Unknown book title(s)" in data["message"]
     assert "Unknown Book" in data["message"]
     assert data["total_books"] > 0
+
+
+def test_get_ranked_recommendations():
+    """Test getting ranked recommendations with reasons and timings."""
+    response = client.post(
+        "/api/recommendations",
+        json={"books_read": ["The Stranger"], "limit": 3}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["recommendations"]) <= 3
+    for book in data["recommendations"]:
+        assert book["title"] != "The Stranger"
+        assert book["reasons"]
+    assert "total" in data["timings_ms"]
+    assert isinstance(data["degraded"], list)
+
+
+def test_get_recommendation_coalesces_concurrent_requests():
+    """Test that a burst of /api/recommend calls on a cold cache shares one catalog query."""
+    from librero import recommender
+
+    query_books = recommender._query_books
+    calls = []
+
+    def slow_query_books(limit):
+        calls.append(limit)
+        time.sleep(0.2)
+        return query_books(limit)
+
+    async def burst():
+        # One event loop, as under uvicorn, so a handler blocking the loop serializes the burst
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+            return await asyncio.gather(*(
+                async_client.post("/api/recommend", json={"books_read": []}) for _ in range(10)
+            ))
+
+    recommender._catalog_pages.clear()
+    coalesced = recommender._flights.coalesced
+    with patch("librero.recommender._query_books", side_effect=slow_query_books):
+        responses = asyncio.run(burst())
+
+    assert all(response.status_code == 200 for response in responses)
+    assert len(calls) == 1
+    assert recommender._flights.coalesced > coalesced
+
+
+def test_get_ranked_recommendations_invalid_limit():
+    """Test that an out-of-range limit is rejected."""
+    response = client.post("/api/recommendations", json={"books_read": [], "limit": 0})
+    assert response.status_code == 422
+
+
+def test_list_books():
+    """Test that cached book pages match a fresh query."""
+    from librero.recommender import get_books_from_db
+
+    first = client.get("/api/books", params={"limit": 3})
+    second = client.get("/api/books", params={"limit": 3})
+    assert first.status_code == 200
+    assert first.headers["content-type"].startswith("application/json")
+    assert first.content == second.content
+    expected = [{"title": title, "authors": authors} for title, authors in get_books_from_db(3)]
+    assert first.json() == {"books": expected}
+
+
+def test_list_books_negative_limit_not_cached():
+    """Test that a negative limit is served without caching a whole-catalog body."""
+    from app import _book_pages
+
+    response = client.get("/api/books", params={"limit": -1})
+    assert response.status_code == 200
+    assert -1 not in _book_pages._payloads
+
+
+def test_list_books_fallback_not_cached():
+    """Test that the default books served while books.db is unreadable do not stick."""
+    from app import _book_pages
+    from librero import recommender
+
+    _book_pages.clear()
+    recommender._catalog_pages.clear()
+    with patch("librero.recommender._query_books", return_value=None):
+        fallback = client.get("/api/books", params={"limit": 7}).json()
+    assert fallback == {"books": [{"title": b.title, "authors": "Albert Camus"} for b in recommender.CAMUS_BOOKS]}
+
+    response = client.get("/api/books", params={"limit": 7})
+    expected = [{"title": title, "authors": authors} for title, authors in recommender.get_books_from_db(7)]
+    assert response.json() == {"books": expected}
+    assert response.json() != fallback
+
+
+def test_export_books_ndjson():
+    """Test streaming the catalog as NDJSON with selected fields."""
+    with client.stream("GET", "/api/books/export", params={"fields": "title,authors"}) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [line for line in response.iter_lines() if line]
+    assert lines
+    first = json.loads(lines[0])
+    assert set(first) == {"title", "authors"}
+
+
+def test_export_books_csv_with_filter():
+    """Test streaming a filtered catalog as CSV."""
+    response = client.get(
+        "/api/books/export",
+        params={"format": "csv", "fields": "title,language_code", "language_code": "fre"}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows[0] == ["title", "language_code"]
+    assert all(row[1] == "fre" for row in rows[1:])
+
+
+def test_export_books_unknown_field():
+    """Test that requesting an unknown field is rejected before streaming."""
+    response = client.get("/api/books/export", params={"fields": "title,password"})
+    assert response.status_code == 400
+    assert "password" in response.json()["detail"]
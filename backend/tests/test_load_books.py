@@ -0,0 +1,122 @@
+"""Tests for the parallel CSV loader in librero.script.load_books."""
+
+import csv
+import sqlite3
+
+import pytest
+from librero.script.load_books import (
+    SCHEMA,
+    chunk_boundaries,
+    load_data,
+    normalize_date,
+    read_header,
+)
+
+HEADER = (
+    "bookID,title,authors,average_rating,isbn,isbn13,language_code,"
+    "  num_pages,ratings_count,text_reviews_count,publication_date,publisher\n"
+)
+
+
+def _row(book_id: int, title: str, pub_date: str = "9/16/2006") -> str:
+    return f"{book_id},{title},Some Author,4.0,0439785960,9780439785969,eng,100,1,1,{pub_date},Pub\n"
+
+
+@pytest.fixture
+def books_csv(tmp_path):
+    path = tmp_path / "books.csv"
+    lines = [HEADER] + [_row(i, f"Book {i:03d}") for i in range(40)]
+    lines.insert(5, "99,Broken, with comma,Author,4.0,1,1,eng,1,1,1,1/1/2000,Pub\n")
+    lines.insert(10, _row(98, "Bad Date", pub_date="11/31/2000"))
+    path.write_text("".join(lines), encoding="utf-8")
+    return path
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "books.db"
+    con = sqlite3.connect(path)
+    con.execute(SCHEMA)
+    con.close()
+    return path
+
+
+def test_read_header_strips_column_names(books_csv):
+    """Test that padded header names such as '  num_pages' are normalized."""
+    header, start = read_header(books_csv)
+    assert "num_pages" in header
+    assert start == len(HEADER)
+
+
+def test_chunk_boundaries_align_to_records(books_csv):
+    """Test that every chunk starts on a line and the chunks cover the file."""
+    _, start = read_header(books_csv)
+    ranges = chunk_boundaries(books_csv, start, chunk_size=100)
+    data = books_csv.read_bytes()
+    assert ranges[0][0] == start
+    assert ranges[-1][1] == len(data)
+    for (_, end), (next_start, _) in zip(ranges, ranges[1:]):
+        assert end == next_start
+        assert data[end - 1:end] == b"\n"
+
+
+def test_normalize_date():
+    """Test that M/D/YYYY dates become ISO dates and impossible ones fail."""
+    assert normalize_date("9/16/2006") == "2006-09-16"
+    with pytest.raises(ValueError):
+        normalize_date("11/31/2000")
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_load_data_quarantines_bad_rows(books_csv, db_path, tmp_path, workers):
+    """Test that valid rows are loaded in order and malformed rows are quarantined."""
+    quarantine = tmp_path / "rejected.csv"
+    stats = load_data(
+        workers=workers,
+        chunk_size=200,
+        csv_path=books_csv,
+        db_path=db_path,
+        quarantine_path=quarantine,
+    )
+    assert stats.loaded == 40
+    assert stats.rejected == 2
+
+    con = sqlite3.connect(db_path)
+    rows = con.execute("SELECT title, publication_date FROM books ORDER BY id").fetchall()
+    con.close()
+    assert [title for title, _ in rows] == [f"Book {i:03d}" for i in range(40)]
+    assert rows[0][1] == "2006-09-16"
+
+    with open(quarantine, newline="", encoding="utf-8") as f:
+        reasons = [row["reason"] for row in csv.DictReader(f)]
+    assert reasons == ["expected 12 fields, got 13", "invalid publication_date '11/31/2000'"]
+
+
+def test_load_data_respects_limit(books_csv, db_path, tmp_path):
+    """Test that the limit caps the number of inserted rows."""
+    stats = load_data(
+        limit=7,
+        workers=2,
+        chunk_size=100,
+        csv_path=books_csv,
+        db_path=db_path,
+        quarantine_path=tmp_path / "rejected.csv",
+    )
+    assert stats.loaded == 7
+    con = sqlite3.connect(db_path)
+    assert con.execute("SELECT COUNT(*) FROM books").fetchone()[0] == 7
+    con.close()
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_load_data_raises_writer_errors(books_csv, tmp_path, workers):
+    """Test that a failing writer stops the load with its error instead of hanging."""
+    with pytest.raises(sqlite3.OperationalError, match="no such table"):
+        load_data(
+            workers=workers,
+            chunk_size=100,
+            csv_path=books_csv,
+            db_path=tmp_path / "empty.db",
+            quarantine_path=tmp_path / "rejected.csv",
+            queue_size=1,
+        )
@@ -0,0 +1,122 @@
+"""Tests for the staged recommendation pipeline in librero.pipeline."""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from librero import pipeline
+from librero.db import get_connection
+from librero.pipeline import (
+    Candidate,
+    DeadlineExceeded,
+    _query,
+    mmr_rerank,
+    recommend_books,
+    score_candidates,
+)
+
+
+def _candidate(book_id: int, title: str, authors: str, score: float) -> Candidate:
+    candidate = Candidate(book_id, title, authors, "eng")
+    candidate.score = score
+    return candidate
+
+
+def test_mmr_rerank_prefers_diversity():
+    """Test that MMR skips a near-duplicate in favor of a different author."""
+    candidates = [
+        _candidate(1, "The Fall", "Albert Camus", 1.0),
+        _candidate(2, "The Fall", "Albert Camus/Justin O'Brien", 0.95),
+        _candidate(3, "Emma", "Jane Austen", 0.8),
+    ]
+    selected, on_time = mmr_rerank(candidates, 2, deadline=time.perf_counter() + 10)
+    assert on_time
+    assert [c.book_id for c in selected] == [1, 3]
+
+
+def test_mmr_rerank_over_budget_keeps_score_order():
+    """Test that an expired deadline falls back to plain score order."""
+    candidates = [
+        _candidate(3, "Emma", "Jane Austen", 0.8),
+        _candidate(1, "The Fall", "Albert Camus", 1.0),
+        _candidate(2, "The Fall", "Albert Camus/Justin O'Brien", 0.95),
+    ]
+    selected, on_time = mmr_rerank(candidates, 2, deadline=0)
+    assert not on_time
+    assert [c.book_id for c in selected] == [1, 2]
+
+
+def test_score_candidates_over_budget_keeps_priors():
+    """Test that scoring past the deadline leaves prior scores in place."""
+    seed = Candidate(1, "The Stranger", "Albert Camus", "eng")
+    candidate = Candidate(2, "The Fall", "Albert Camus", "eng", sources={"author": "Also by Albert Camus"})
+    assert score_candidates([candidate], [seed], deadline=0) is False
+    prior = candidate.score
+    assert score_candidates([candidate], [seed], deadline=time.perf_counter() + 10) is True
+    assert candidate.score > prior
+
+
+def test_recommend_books_excludes_read_books():
+    """Test that the pipeline returns unread books with reasons and timings."""
+    result = recommend_books(["The Stranger"], n=3)
+    assert 0 < len(result.recommendations) <= 3
+    for book in result.recommendations:
+        assert book.title.lower() != "the stranger"
+        assert book.reasons
+    assert {"seeds", "candidates", "scoring", "rerank", "total"} <= set(result.timings_ms)
+
+
+def test_recommend_books_degrades_over_budget():
+    """Test that zero budgets degrade stages instead of failing."""
+    result = recommend_books(["The Stranger"], n=3, budgets_ms={"scoring": 0, "rerank": 0})
+    assert "scoring" in result.degraded
+    assert "rerank" in result.degraded
+
+
+def test_query_interrupted_at_deadline():
+    """Test that a long-running query is interrupted once its deadline passes."""
+    start = time.perf_counter()
+    with pytest.raises(DeadlineExceeded):
+        _query(
+            """
+            WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 100000000)
+            SELECT COUNT(*) FROM n
+            """,
+            (),
+            deadline=start + 0.05,
+        )
+    assert time.perf_counter() - start < 1
+
+
+def test_recommend_books_drops_late_generators():
+    """Test that generators past the candidate budget are reported, not awaited."""
+    result = recommend_books(["The Stranger"], n=3, budgets_ms={"candidates": 0})
+    assert {"candidates:author", "candidates:popular", "candidates:language"} <= set(result.degraded)
+
+
+def test_recommend_books_under_concurrent_load(monkeypatch):
+    """Test that concurrent requests all get recommendations and leave no queued work."""
+    started = []
+
+    def slow_neighbors(seeds, limit, deadline=None):
+        started.append(1)
+        time.sleep(0.5)
+        return []
+
+    monkeypatch.setitem(pipeline.GENERATORS, "neighbors", slow_neighbors)
+    con = get_connection()
+    try:
+        titles = [row[0] for row in con.execute("SELECT title FROM books ORDER BY id LIMIT 64")]
+    finally:
+        con.close()
+
+    with ThreadPoolExecutor(max_workers=32) as clients:
+        results = list(clients.map(lambda title: recommend_books([title], n=5), titles))
+
+    assert all(result.recommendations for result in results)
+    # Lookups that had not started when their request returned were cancelled
+    # rather than left to run later
+    ran = len(started)
+    time.sleep(0.6)
+    assert len(started) == ran
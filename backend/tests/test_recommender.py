@@ -1,8 +1,24 @@
 """Unit tests for the librero.recommender module."""
 
+import os
+import sqlite3
 from unittest.mock import MagicMock, patch
 
-from librero.recommender import CAMUS_BOOKS, Book, has_read_all_books, recommend_book
+import pytest
+
+from librero import recommender
+from librero.ann import AnnIndex, book_features
+from librero.recommender import (
+    CAMUS_BOOKS,
+    Book,
+    ann_index_is_stale,
+    get_ann_index,
+    get_books_from_db,
+    get_similar_books,
+    has_read_all_books,
+    iter_books,
+    recommend_book,
+)
 
 
 def test_recommend_book_returns_book_object() -> None:
@@ -90,3 +106,99 @@ def test_recommend_book_with_read_books(mock_choice: MagicMock) -> None:
     result = recommend_book(read_books)
     assert result == remaining_books[0]
     assert result.title not in read_books
+
+
+@patch("librero.recommender.get_ann_index", return_value=None)
+def test_get_similar_books_without_index(mock_index: MagicMock) -> None:
+    """Test that similar-book lookups are empty when the index is not built."""
+    assert get_similar_books("The Plague") == []
+
+
+def test_get_similar_books_same_author(tmp_path) -> None:
+    """Test that similar books for a Camus title are Camus books."""
+    from librero.db import DB_PATH
+    from librero.script.build_index import build_index
+
+    index = build_index(db_path=DB_PATH, index_path=tmp_path / "books.ann")
+    try:
+        with patch("librero.recommender.get_ann_index", return_value=index):
+            similar = get_similar_books("the plague", limit=3)
+    finally:
+        index.close()
+    assert len(similar) == 3
+    assert all("Albert Camus" in authors for _, authors in similar)
+    assert all(title.lower() != "the plague" for title, _ in similar)
+
+
+def test_get_books_from_db_cached_per_catalog_version(monkeypatch) -> None:
+    """Test that book lists are queried once per catalog version."""
+    calls = []
+    monkeypatch.setattr(recommender, "_query_books", lambda limit: calls.append(limit) or [("A", "B")])
+    monkeypatch.setattr(recommender, "_catalog_pages", {})
+    monkeypatch.setattr(recommender, "catalog_version", lambda: (1, 100))
+    assert get_books_from_db(3) == [("A", "B")]
+    assert get_books_from_db(3) == [("A", "B")]
+    assert calls == [3]
+
+    monkeypatch.setattr(recommender, "catalog_version", lambda: (2, 200))
+    get_books_from_db(3)
+    assert calls == [3, 3]
+
+
+def test_ann_index_reopened_but_not_rebuilt(tmp_path, monkeypatch) -> None:
+    """Test that a rebuilt index file is reopened and a stale one is only reported."""
+    index_path = tmp_path / "books.ann"
+    db_path = tmp_path / "books.db"
+    db_path.write_bytes(b"")
+    monkeypatch.setattr(recommender, "INDEX_PATH", str(index_path))
+    monkeypatch.setattr("librero.db.DB_PATH", str(db_path))
+    monkeypatch.setattr(recommender, "_ann_index", None)
+    monkeypatch.setattr(recommender, "_ann_index_version", None)
+
+    AnnIndex.build(((1, book_features("The Stranger", "Albert Camus", "eng")),), str(index_path)).close()
+    os.utime(index_path, ns=(0, 0))
+    first = get_ann_index()
+    assert first is not None and len(first) == 1
+    assert ann_index_is_stale()
+
+    items = [(1, book_features("The Stranger", "Albert Camus", "eng")),
+             (2, book_features("The Plague", "Albert Camus", "eng"))]
+    AnnIndex.build(items, str(index_path)).close()
+    second = get_ann_index()
+    assert second is not None and len(second) == 2
+    assert not ann_index_is_stale()
+
+
+def test_iter_books_streams_batches() -> None:
+    """Test that the catalog is streamed in bounded batches with the selected fields."""
+    batches = iter_books(("id", "title"), batch_size=100)
+    first = next(batches)
+    assert 0 < len(first) <= 100
+    assert all(len(row) == 2 for row in first)
+    ids = [row[0] for row in first] + [row[0] for batch in batches for row in batch]
+    assert ids == sorted(ids)
+
+
+def test_iter_books_rejects_unknown_fields() -> None:
+    """Test that only known columns can be selected."""
+    with pytest.raises(ValueError):
+        next(iter_books(("title", "1; DROP TABLE books")))
+
+
+def test_iter_books_does_not_block_writers(tmp_path, monkeypatch) -> None:
+    """Test that a paused export holds no lock that would block a writer's commit."""
+    db_path = tmp_path / "books.db"
+    con = sqlite3.connect(db_path)
+    con.execute("CREATE TABLE books (id INTEGER PRIMARY KEY, title TEXT, authors TEXT)")
+    con.executemany("INSERT INTO books VALUES (?, ?, 'Author')", [(i, f"Book {i}") for i in range(1, 11)])
+    con.commit()
+    monkeypatch.setattr(recommender, "get_connection", lambda **kwargs: sqlite3.connect(db_path, **kwargs))
+
+    batches = iter_books(("title",), batch_size=4)
+    assert next(batches) == [(f"Book {i}",) for i in range(1, 5)]
+    writer = sqlite3.connect(db_path, timeout=0.1)
+    writer.execute("INSERT INTO books VALUES (11, 'Book 11', 'Author')")
+    writer.commit()
+    writer.close()
+    assert [row for batch in batches for row in batch][-1] == ("Book 11",)
+    con.close()
@@ -0,0 +1,67 @@
+"""Tests for librero.serialization."""
+
+import json
+from unittest.mock import patch
+
+from librero.serialization import PayloadCache, dumps
+
+
+def test_dumps_matches_compact_json():
+    """Test that the fast encoder produces compact, non-escaped UTF-8 JSON."""
+    content = {"books": [{"title": "L'Étranger", "authors": "Albert Camus"}], "total": 1}
+    expected = json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    assert dumps(content) == expected
+    with patch("librero.serialization.orjson", None):
+        assert dumps(content) == expected
+
+
+@patch("librero.serialization.catalog_version", return_value=(1, 100))
+def test_payload_cache_reuses_payload(mock_version):
+    """Test that a payload is built once per key and catalog version."""
+    cache = PayloadCache()
+    calls = []
+
+    def build():
+        calls.append(1)
+        return {"books": []}
+
+    assert cache.get_or_build(5, build) == b'{"books":[]}'
+    assert cache.get_or_build(5, build) == b'{"books":[]}'
+    assert len(calls) == 1
+
+    mock_version.return_value = (2, 100)
+    cache.get_or_build(5, build)
+    assert len(calls) == 2
+
+
+@patch("librero.serialization.catalog_version", return_value=None)
+def test_payload_cache_skips_missing_catalog(mock_version):
+    """Test that nothing is cached while the database file is missing."""
+    cache = PayloadCache()
+    calls = []
+    for _ in range(2):
+        cache.get_or_build(5, lambda: calls.append(1) or {})
+    assert len(calls) == 2
+
+
+@patch("librero.serialization.catalog_version", return_value=(1, 100))
+def test_payload_cache_skips_unavailable_data(mock_version):
+    """Test that a build reporting unavailable data is not cached."""
+    cache = PayloadCache()
+    assert cache.get_or_build(5, lambda: None) is None
+    assert cache.get_or_build(5, lambda: {"books": []}) == b'{"books":[]}'
+
+
+@patch("librero.serialization.catalog_version", return_value=(1, 100))
+def test_payload_cache_evicts_least_recently_used(mock_version):
+    """Test that the cache stays within max_entries."""
+    cache = PayloadCache(max_entries=2)
+    calls = []
+
+    def build(key):
+        calls.append(key)
+        return {"key": key}
+
+    for key in (1, 2, 1, 3, 1, 2):
+        cache.get_or_build(key, lambda: build(key))
+    assert calls == [1, 2, 3, 2]
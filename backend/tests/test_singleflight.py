@@ -0,0 +1,60 @@
+"""Tests for librero.singleflight."""
+
+import threading
+import time
+
+import pytest
+from librero.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_run():
+    """Test that callers arriving during a run get its result without running again."""
+    flights = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    runs = []
+
+    def expensive():
+        runs.append(1)
+        started.set()
+        release.wait(5)
+        return "catalog"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flights.do("key", expensive)))
+    leader.start()
+    started.wait(5)
+    followers = [
+        threading.Thread(target=lambda: results.append(flights.do("key", expensive)))
+        for _ in range(4)
+    ]
+    for thread in followers:
+        thread.start()
+    while flights.coalesced < 4:
+        time.sleep(0.001)
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join(5)
+
+    assert runs == [1]
+    assert results == ["catalog"] * 5
+
+
+def test_errors_are_shared_and_not_cached():
+    """Test that a failure propagates and the next call runs again."""
+    flights = SingleFlight()
+
+    def fail():
+        raise RuntimeError("database locked")
+
+    with pytest.raises(RuntimeError):
+        flights.do("key", fail)
+    assert flights.do("key", lambda: 42) == 42
+
+
+def test_different_keys_run_independently():
+    """Test that only calls with the same key are coalesced."""
+    flights = SingleFlight()
+    assert flights.do("a", lambda: 1) == 1
+    assert flights.do("b", lambda: 2) == 2
+    assert flights.coalesced == 0
@@ -0,0 +1,59 @@
+"""Tests for librero.warmup."""
+
+from unittest.mock import patch
+
+from librero.warmup import StepDegraded, WarmUp
+
+
+@patch("librero.warmup.catalog_version", return_value=(1, 100))
+def test_warmup_reports_ready_after_all_steps(mock_version):
+    """Test that readiness flips only after every step has run."""
+    calls = []
+    warmup = WarmUp([("catalog", lambda: calls.append("catalog")), ("index", lambda: calls.append("index"))])
+    assert warmup.report()["status"] == "warming_up"
+
+    assert warmup.run() is True
+    report = warmup.report()
+    assert report["status"] == "ready"
+    assert report["steps"] == {"catalog": "ok", "index": "ok"}
+    assert set(report["timings_ms"]) == {"catalog", "index"}
+    assert calls == ["catalog", "index"]
+
+
+@patch("librero.warmup.catalog_version", return_value=(1, 100))
+def test_warmup_failed_step_is_not_ready(mock_version):
+    """Test that a failing step keeps the service not ready."""
+    def fail():
+        raise RuntimeError("no database")
+
+    warmup = WarmUp([("catalog", fail)])
+    assert warmup.run() is False
+    assert warmup.status["catalog"] == "failed: no database"
+
+
+@patch("librero.warmup.catalog_version", return_value=(1, 100))
+def test_warmup_rewarms_after_catalog_change(mock_version):
+    """Test that a catalog reload triggers a new warm-up."""
+    calls = []
+    warmup = WarmUp([("catalog", lambda: calls.append(1))])
+    warmup.start()
+    assert warmup.wait(5) is True
+
+    mock_version.return_value = (2, 200)
+    warmup.is_ready()
+    assert warmup.wait(5) is True
+    assert len(calls) == 2
+    assert warmup.version == (2, 200)
+
+
+@patch("librero.warmup.catalog_version", return_value=(1, 100))
+def test_warmup_degraded_step_is_ready(mock_version):
+    """Test that a degraded step is reported without blocking readiness."""
+    def no_index():
+        raise StepDegraded("index not built")
+
+    warmup = WarmUp([("ann_index", no_index)])
+    assert warmup.run() is True
+    report = warmup.report()
+    assert report["status"] == "ready"
+    assert report["steps"] == {"ann_index": "degraded: index not built"}